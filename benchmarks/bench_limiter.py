@@ -0,0 +1,74 @@
+"""
+Benchmark of the brick wall limiter for different attack times. The running minimum of the
+lookahead and the staircase attack smoothing take the same time for any attack time, so neither
+brick_wall_limit nor the streaming Limiter used by bender process --limit depend on it, while the
+naive windowed minimum grows linearly with the attack time.
+
+Usage: PYTHONPATH=. python benchmarks/bench_limiter.py [seconds] [sample_rate]
+"""
+
+import sys
+import time
+from typing import Callable
+
+import numba
+import numpy as np
+
+from bender.effects import Limiter, brick_wall_limit, sliding_min
+
+
+@numba.jit(nopython=True, nogil=True)
+def naive_sliding_min(values: np.ndarray, window: int) -> np.ndarray:
+    result = np.empty_like(values)
+    for i in range(len(values)):
+        result[i] = np.min(values[i : i + window])
+    return result
+
+
+def limit_stream(signal: np.ndarray, sample_rate: int, attack_time: float) -> None:
+    limiter = Limiter(1, sample_rate, attack_time)
+    blocks = (signal[i : i + 65536, None] for i in range(0, len(signal), 65536))
+    for _ in limiter.stream(blocks):
+        pass
+
+
+def measure(fn: Callable[[], object], repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 96000
+
+    rng = np.random.default_rng(0)
+    signal = rng.uniform(-2.0, 2.0, size=int(duration * sample_rate)).astype(np.float32)
+    gain = np.minimum(1.0 / np.abs(signal), 1.0).astype(np.float32)
+
+    # Compile before timing
+    sliding_min(gain[:1000], 10)
+    naive_sliding_min(gain[:1000], 10)
+    brick_wall_limit(signal[:1000], sample_rate, 0.001)
+    list(Limiter(1, sample_rate).stream([signal[:1000, None]]))
+
+    print(f"{duration:g} s at {sample_rate} Hz")
+    print(f"{'attack':>10} {'running min':>12} {'naive min':>12} {'limiter':>12} {'streaming':>12}")
+    for attack_time in (0.0001, 0.001, 0.005, 0.02):
+        window = int(attack_time * sample_rate)
+        running = measure(lambda: sliding_min(gain, window))
+        naive = measure(lambda: naive_sliding_min(gain, window), repeats=1)
+        limiter = measure(lambda: brick_wall_limit(signal, sample_rate, attack_time))
+        streaming = measure(lambda: limit_stream(signal, sample_rate, attack_time))
+
+        print(
+            f"{attack_time * 1000:>8g}ms {running:>11.3f}s {naive:>11.3f}s "
+            f"{limiter:>11.3f}s {streaming:>11.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from bender.cli.convert import convert_command
 from bender.cli.edit import edit_command
 from bender.cli.monitor import monitor_command
 from bender.cli.process import process_command
+from bender.cli.warmup import warmup_command
 
 
 def _split_parameter_assignment(value: str) -> tuple[str, str] | None:
@@ -57,6 +58,7 @@ cli.add_command(convert_command)
 cli.add_command(monitor_command)
 cli.add_command(edit_command)
 cli.add_command(process_command)
+cli.add_command(warmup_command)
 
 
 def main(argv: list[str] | None = None) -> None:
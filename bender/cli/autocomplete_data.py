@@ -13,6 +13,7 @@ AUTOCOMPLETE = {
         ],
         "qam": [
             "carrier_frequency",
+            "channels",
             "sample_rate",
         ],
     },
@@ -46,7 +47,9 @@ AUTOCOMPLETE = {
     },
     "process": {
         "delay": [
+            "control",
             "feedback",
+            "interpolation",
             "lt",
             "mix",
             "pingpong",
@@ -54,8 +57,11 @@ AUTOCOMPLETE = {
             "rt",
         ],
         "distortion": [
+            "control",
             "gain",
             "kind",
+            "mix",
+            "oversample",
         ],
     },
 }
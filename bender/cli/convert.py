@@ -20,9 +20,11 @@ from bender.cli.utils import (
     parameters_to_dict,
 )
 from bender.converter import ConvertedImage, Converter
-from bender.sound import Sound
+from bender.resampler import DEFAULT_RESAMPLE_QUALITY, RESAMPLE_QUALITIES
+from bender.sound import Sound, SoundWriter
 
 DEFAULT_ALGORITHM = "bmp"
+DEFAULT_SAMPLE_RATE = 48000
 
 
 # options shared with monitor command
@@ -65,6 +67,19 @@ converter_shared_options = [
         default=False,
         help="Rotate image 90 degrees clockwise before processing.",
     ),
+    click.option(
+        "--resample-quality",
+        type=click.Choice(RESAMPLE_QUALITIES, case_sensitive=False),
+        default=DEFAULT_RESAMPLE_QUALITY,
+        help=f"Resampling quality (default: {DEFAULT_RESAMPLE_QUALITY}).",
+    ),
+    click.option(
+        "--native-rate",
+        is_flag=True,
+        default=False,
+        help="Write sound at the native sample rate of the algorithm instead of "
+        f"{DEFAULT_SAMPLE_RATE} Hz (image -> sound only).",
+    ),
     click.option("-f", "--force", is_flag=True, default=False, help="Overwrite existing files."),
 ]
 
@@ -128,6 +143,8 @@ def _image_to_sound(
     force: bool,
     rotate: bool = False,
     metadata_out: Path | None = None,
+    resample_quality: str = DEFAULT_RESAMPLE_QUALITY,
+    native_rate: bool = False,
 ) -> Path:
     if algorithm is None:
         algorithm = DEFAULT_ALGORITHM
@@ -188,7 +205,12 @@ def _image_to_sound(
             raise click.UsageError(f"{metadata_path} already exists, use -f to overwrite")
 
     click.echo(f"Saving {sound_path}")
-    result.sound.resample(48000).save(sound_path, bit_depth=bit_depth)
+    sample_rate = result.sound.sample_rate if native_rate else DEFAULT_SAMPLE_RATE
+    blocks = result.sound.resampled_blocks(sample_rate, quality=resample_quality)
+
+    with SoundWriter(sound_path, sample_rate, result.sound.channels, bit_depth=bit_depth) as writer:
+        for block in blocks:
+            writer.write(block)
 
     click.echo(f"Saving {metadata_path}")
     metadata_path.write_text(dumped_metadata)
@@ -205,6 +227,7 @@ def _sound_to_image(
     force: bool,
     output_format: str | None = None,
     metadata: Path | None = None,
+    resample_quality: str = DEFAULT_RESAMPLE_QUALITY,
 ) -> Path:
     if output.is_dir():
         ext = OUTPUT_IMAGE_FORMATS[output_format or DEFAULT_OUTPUT_IMAGE_FORMAT][0]
@@ -226,7 +249,7 @@ def _sound_to_image(
     else:
         click.echo(f"Found metadata at {metadata_path}")
 
-    sound = Sound.load(file)
+    sound = Sound.load(file, mmap=True)
     metadata_data = json.loads(metadata_path.read_text())
 
     if algorithm is None:
@@ -242,7 +265,14 @@ def _sound_to_image(
     parameters = {**metadata_data.get("parameters", {}), **parameters}
 
     converter = _build_converter(algorithm, parameters)
-    image = converter.decode(ConvertedImage(sound, metadata_data.get("metadata", {})))
+
+    if converter.sample_rate is not None:
+        sound = sound.resample(converter.sample_rate, quality=resample_quality)
+
+    try:
+        image = converter.decode(ConvertedImage(sound, metadata_data.get("metadata", {})))
+    except ValueError as err:
+        raise click.UsageError(f"{file}: {err}")
 
     if not isinstance(image, Image.Image):
         raise click.UsageError(f"converter returned invalid result: {image}")
@@ -282,6 +312,8 @@ def _convert_command(
     output_format: str | None = None,
     metadata: Path | None = None,
     metadata_out: Path | None = None,
+    resample_quality: str = DEFAULT_RESAMPLE_QUALITY,
+    native_rate: bool = False,
 ) -> Path:
     if parameters is None:
         parameters = []
@@ -303,6 +335,8 @@ def _convert_command(
             force=force,
             rotate=rotate,
             metadata_out=metadata_out,
+            resample_quality=resample_quality,
+            native_rate=native_rate,
         )
 
     if is_sound_file(file):
@@ -315,6 +349,7 @@ def _convert_command(
             force=force,
             output_format=output_format,
             metadata=metadata,
+            resample_quality=resample_quality,
         )
 
     raise click.UsageError(
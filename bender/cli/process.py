@@ -10,9 +10,9 @@ from bender.cli.utils import (
     is_sound_file,
     parameters_to_dict,
 )
-from bender.effects import brick_wall_limit
+from bender.effects import Limiter
 from bender.processor import Processor
-from bender.sound import Sound
+from bender.sound import Sound, SoundWriter
 
 
 def _build_processor(
@@ -62,7 +62,7 @@ def _process_command(
             raise click.UsageError(f"{file}: not a sound file")
 
         click.echo(f"Loading {file}")
-        sound = Sound.load(file)
+        sound = Sound.load(file, mmap=True)
 
         sounds.append(sound)
 
@@ -92,14 +92,20 @@ def _process_command(
     else:
         output_path = output
 
-    if limit:
-        result = result.process(brick_wall_limit)
-
     if not force and output_path.exists():
         raise click.UsageError(f"{output_path} already exists, use -f to overwrite")
 
     click.echo(f"Saving {output_path}")
-    result.save(output_path, bit_depth=bit_depth)
+    with SoundWriter(
+        output_path, result.sample_rate, result.channels, bit_depth=bit_depth
+    ) as writer:
+        # Identical channels are limited once and expanded by the writer
+        blocks = result.blocks(expand=False)
+        if limit:
+            blocks = Limiter(result.data.shape[1], result.sample_rate).stream(blocks)
+
+        for block in blocks:
+            writer.write(block)
 
     return output_path
 
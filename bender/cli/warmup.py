@@ -0,0 +1,21 @@
+import time
+
+import click
+
+from bender import delayline, effects, lazy, modulation, oversampling, waveshaper
+from bender.processors import delay
+
+# Modules with numba kernels, each provides a warmup function
+_KERNEL_MODULES = [effects, modulation, delayline, oversampling, waveshaper, lazy, delay]
+
+
+@click.command(
+    "warmup",
+    help="Compile numba kernels ahead of time and cache them, so that later runs start faster.",
+)
+def warmup_command() -> None:
+    for module in _KERNEL_MODULES:
+        click.echo(f"Compiling {module.__name__}")
+        start = time.perf_counter()
+        module.warmup()
+        click.echo(f"Done in {time.perf_counter() - start:.2f}s")
@@ -13,6 +13,9 @@ class ConvertedImage:
 
 
 class Converter:
+    # sample rate the converter encodes at and expects during decoding, None if any rate works
+    sample_rate: int | None = None
+
     def encode(self, image: Image.Image) -> ConvertedImage:
         raise NotImplementedError(f"encode is not implemented in {self.__class__.__name__}")
 
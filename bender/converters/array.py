@@ -7,7 +7,7 @@ from bender.converter import ConvertedImage, Converter
 from bender.converters.utils import pad_reshape
 from bender.entity import entity
 from bender.parameter import BoolParameter, IntParameter
-from bender.sound import Sound
+from bender.sound import SAMPLE_DTYPE, Sound
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -22,7 +22,7 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
             min_value=0,
         ),
         "average": BoolParameter(
-            description="Average channels during decoding, otherwise use only left channel",
+            description="Average all channels during decoding, otherwise use only the first channel",
         ),
     },
 )
@@ -40,7 +40,7 @@ class ArrayConverter(Converter):
 
     def encode(self, image: Image.Image) -> ConvertedImage:
         # scale to [-1, 1]
-        arr = np.array(image).astype(np.float32) / 255.0
+        arr = np.array(image).astype(SAMPLE_DTYPE) / 255.0
         arr = arr * 2.0 - 1.0
 
         # permute axes
@@ -61,7 +61,7 @@ class ArrayConverter(Converter):
 
         # get mono signal
         if self.average:
-            mono = (converted_image.sound.left + converted_image.sound.right) / 2.0
+            mono = converted_image.sound.data.mean(axis=1)
         else:
             mono = converted_image.sound.left
 
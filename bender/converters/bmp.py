@@ -1,5 +1,6 @@
 import base64
 import io
+import struct
 
 import numpy as np
 from PIL import Image, ImageFile
@@ -7,7 +8,7 @@ from PIL import Image, ImageFile
 from bender.converter import ConvertedImage, Converter
 from bender.entity import entity
 from bender.parameter import BoolParameter, IntParameter
-from bender.sound import Sound
+from bender.sound import SAMPLE_DTYPE, Sound
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -19,6 +20,109 @@ DTYPES: dict[int, np.dtype] = {
     4: np.dtype(np.uint64),
 }
 
+# float32 holds integers of up to 24 bits exactly, wider samples are scaled in float64
+_SCALE_DTYPES: dict[int, np.dtype] = {
+    1: np.dtype(np.float32),
+    2: np.dtype(np.float32),
+    3: np.dtype(np.float64),
+    4: np.dtype(np.float64),
+}
+
+# Bits per pixel and the order of the channels in BMP pixels of image modes that are serialized
+# directly, other modes are saved by PIL
+BMP_MODES: dict[str, tuple[int, list[int]]] = {
+    "RGB": (24, [2, 1, 0]),
+    "RGBA": (32, [2, 1, 0, 3]),
+}
+
+# File header and BITMAPINFOHEADER, as written by PIL
+_FILE_HEADER = struct.Struct("<2sIII")
+_INFO_HEADER = struct.Struct("<IiiHHIIIIII")
+_HEADER_SIZE = _FILE_HEADER.size + _INFO_HEADER.size
+
+# 96 DPI in pixels per meter
+_PIXELS_PER_METER = 3780
+
+
+def _encode_bmp(image: Image.Image) -> np.ndarray:
+    """
+    Serialize an image to an uncompressed bottom-up BMP in a single buffer, byte-identical to
+    the BMP saved by PIL.
+
+    :param image: Image of one of the BMP_MODES.
+    :return: BMP bytes.
+    """
+    bits, order = BMP_MODES[image.mode]
+    width, height = image.size
+    stride = ((width * bits + 31) >> 3) & ~3
+
+    buffer = np.zeros(_HEADER_SIZE + stride * height, dtype=np.uint8)
+    _FILE_HEADER.pack_into(buffer, 0, b"BM", len(buffer), 0, _HEADER_SIZE)
+    _INFO_HEADER.pack_into(
+        buffer,
+        _FILE_HEADER.size,
+        _INFO_HEADER.size,
+        width,
+        height,
+        1,
+        bits,
+        0,
+        stride * height,
+        _PIXELS_PER_METER,
+        _PIXELS_PER_METER,
+        0,
+        0,
+    )
+
+    # Rows are stored from the bottom up and padded to 4 bytes
+    rows = buffer[_HEADER_SIZE:].reshape(height, stride)[::-1, : width * bits // 8]
+    rows.reshape(height, width, bits // 8)[:] = np.asarray(image)[..., order]
+
+    return buffer
+
+
+def _decode_bmp(buffer: np.ndarray) -> Image.Image | None:
+    """
+    Read an uncompressed bottom-up 24 or 32-bit BMP the same way as PIL, missing rows of pixel
+    data are black.
+
+    :param buffer: BMP bytes.
+    :return: RGB image, or None if the BMP has to be read by PIL.
+    """
+    if len(buffer) < _HEADER_SIZE:
+        return None
+
+    magic, _, _, offset = _FILE_HEADER.unpack_from(buffer, 0)
+    info_size, width, height, _, bits, compression, *_ = _INFO_HEADER.unpack_from(
+        buffer, _FILE_HEADER.size
+    )
+
+    if (
+        magic != b"BM"
+        or info_size != _INFO_HEADER.size
+        or offset < _HEADER_SIZE
+        or bits not in (24, 32)
+        or compression != 0
+        or width <= 0
+        or height <= 0
+        # PIL checks the size only if a limit is set
+        or (Image.MAX_IMAGE_PIXELS is not None and width * height > Image.MAX_IMAGE_PIXELS)
+    ):
+        return None
+
+    stride = ((width * bits + 31) >> 3) & ~3
+    pixels = buffer[offset : offset + stride * height]
+    if len(pixels) < stride * height:
+        # Only complete rows are read
+        complete = len(pixels) // stride * stride
+        pixels = np.concatenate([pixels[:complete], np.zeros(stride * height - complete, np.uint8)])
+
+    # The alpha of 32-bit pixels is ignored, as by PIL
+    rows = pixels.reshape(height, stride)[::-1, : width * bits // 8]
+    rgb = rows.reshape(height, width, bits // 8)[..., [2, 1, 0]]
+
+    return Image.fromarray(rgb, mode="RGB")
+
 
 @entity(
     name="bmp",
@@ -34,7 +138,7 @@ DTYPES: dict[int, np.dtype] = {
             max_value=4,
         ),
         "average": BoolParameter(
-            description="Average channels during decoding, otherwise use only left channel",
+            description="Average all channels during decoding, otherwise use only the first channel",
         ),
     },
 )
@@ -51,11 +155,19 @@ class BMPConverter(Converter):
         except LookupError:
             raise ValueError(f"Unsupported sample size: {sample_size}")
 
+        self.scale_dtype = _SCALE_DTYPES[sample_size]
+
+        # Maximum sample as a float, for 64-bit samples it rounds up to 2**64
+        self.max_value = self.scale_dtype.type(np.iinfo(self.dtype).max)
+
     def encode(self, image: Image.Image) -> ConvertedImage:
-        with io.BytesIO() as fd:
-            image.save(fd, format="BMP")
-            fd.seek(0)
-            buffer = np.frombuffer(fd.read(), dtype=np.uint8).copy()
+        if image.mode in BMP_MODES:
+            buffer = _encode_bmp(image)
+        else:
+            with io.BytesIO() as fd:
+                image.save(fd, format="BMP")
+                fd.seek(0)
+                buffer = np.frombuffer(fd.read(), dtype=np.uint8).copy()
 
         # save header to attach it during decoding
         metadata = {
@@ -65,9 +177,9 @@ class BMPConverter(Converter):
         # raw BMP dwords
         mono = buffer[self.header_size :].view(self.dtype)
         # scale to [0, 1]
-        mono = mono.astype(np.float64) / np.iinfo(self.dtype).max
+        mono = mono.astype(self.scale_dtype) / self.max_value
         # scale to [-1, 1]
-        mono = mono * 2.0 - 1.0
+        mono = (mono * 2.0 - 1.0).astype(SAMPLE_DTYPE)
 
         return ConvertedImage(
             sound=Sound(left=mono, right=mono, sample_rate=48000), metadata=metadata
@@ -81,17 +193,25 @@ class BMPConverter(Converter):
 
         # get mono signal
         if self.average:
-            mono = (converted_image.sound.left + converted_image.sound.right) / 2.0
+            mono = converted_image.sound.data.mean(axis=1)
         else:
             mono = converted_image.sound.left
 
-        # scale to [0, 1]
-        mono = (mono + 1.0) / 2.0
-        # convert to raw BMP dwords
-        mono = (mono * np.iinfo(self.dtype).max).astype(self.dtype)
+        # scale to [0, 1], processed samples can be out of range
+        mono = np.clip((mono.astype(self.scale_dtype) + 1.0) / 2.0, 0.0, 1.0)
+        # convert to raw BMP dwords, the top of the range is set separately as it cannot be cast
+        # for 64-bit samples
+        mono = np.rint(mono * self.max_value)
+        top = mono == self.max_value
+        mono[top] = 0
+        mono = mono.astype(self.dtype)
+        mono[top] = np.iinfo(self.dtype).max
+
+        buffer = np.concatenate([header, mono.view(np.uint8)])
 
-        buffer = np.concatenate([header, mono.view(np.uint8)]).tobytes()
+        if (image := _decode_bmp(buffer)) is not None:
+            return image
 
-        with io.BytesIO(buffer) as fd:
+        with io.BytesIO(buffer.tobytes()) as fd:
             with Image.open(fd, formats=["BMP"]) as image:
                 return image.copy()
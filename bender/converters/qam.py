@@ -13,7 +13,7 @@ from bender.converters.utils import (
 )
 from bender.entity import entity
 from bender.parameter import IntParameter
-from bender.sound import Sound
+from bender.sound import SAMPLE_DTYPE, Sound
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -32,17 +32,29 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
             default=7800,
             min_value=3,
         ),
+        "channels": IntParameter(
+            description="Number of channels, must be even, the image is split between channel pairs to make the sound shorter",
+            default=2,
+            min_value=2,
+        ),
     },
 )
 class QAMConverter(Converter):
-    def __init__(self, carrier_frequency: int = 1300, sample_rate: int = 7800) -> None:
+    sample_rate: int
+
+    def __init__(
+        self, carrier_frequency: int = 1300, sample_rate: int = 7800, channels: int = 2
+    ) -> None:
         super().__init__()
 
         if carrier_frequency >= sample_rate / 2:
             raise ValueError("Carrier frequency must be less than half of the sample rate")
+        if channels < 2 or channels % 2 != 0:
+            raise ValueError("Number of channels must be a positive even number")
 
         self.carrier_frequency = carrier_frequency
         self.sample_rate = sample_rate
+        self.channels = channels
 
     def encode(self, image: Image.Image) -> ConvertedImage:
         arr = np.array(image)
@@ -51,26 +63,45 @@ class QAMConverter(Converter):
             "shape": arr.shape[:2],
         }
 
-        arr = arr / 255.0
+        arr = arr.astype(SAMPLE_DTYPE) / 255.0
         r, g, b = arr[..., 0].ravel(), arr[..., 1].ravel(), arr[..., 2].ravel()
         y, c_b, c_r = rgb_to_ycbcr(r, g, b)
 
-        left = am_encode(y, self.carrier_frequency, self.sample_rate)
-        right = qam_encode(c_b, c_r, self.carrier_frequency, self.sample_rate)
+        # Split the pixels into equal segments, one for each pair of channels
+        pairs = self.channels // 2
+        segment = -(-len(y) // pairs)
+        y, c_b, c_r = (np.pad(c, (0, segment * pairs - len(c))) for c in (y, c_b, c_r))
+
+        channels = []
+        for i in range(pairs):
+            part = slice(i * segment, (i + 1) * segment)
+            left = am_encode(y[part], self.carrier_frequency, self.sample_rate)
+            right = qam_encode(c_b[part], c_r[part], self.carrier_frequency, self.sample_rate)
 
-        # Bring left channel down to be closer to right channel
-        left /= 2.0
+            # Bring left channel down to be closer to right channel
+            left /= 2.0
+
+            channels += [left, right]
 
         return ConvertedImage(
-            sound=Sound(left=left, right=right, sample_rate=self.sample_rate),
+            sound=Sound.from_channels(channels, sample_rate=self.sample_rate),
             metadata=metadata,
         )
 
     def decode(self, converted_image: ConvertedImage) -> Image.Image:
         sound = converted_image.sound.resample(self.sample_rate)
 
-        y = am_decode(sound.left * 2.0, self.carrier_frequency, self.sample_rate)
-        c_b, c_r = qam_decode(sound.right, self.carrier_frequency, self.sample_rate)
+        if sound.channels < self.channels:
+            raise ValueError(f"Expected {self.channels} channels, got {sound.channels}")
+
+        ys, c_bs, c_rs = [], [], []
+        for i in range(0, self.channels, 2):
+            ys.append(am_decode(sound.channel(i) * 2.0, self.carrier_frequency, self.sample_rate))
+            c_b, c_r = qam_decode(sound.channel(i + 1), self.carrier_frequency, self.sample_rate)
+            c_bs.append(c_b)
+            c_rs.append(c_r)
+
+        y, c_b, c_r = np.concatenate(ys), np.concatenate(c_bs), np.concatenate(c_rs)
 
         r, g, b = ycbcr_to_rgb(y, c_b, c_r)
 
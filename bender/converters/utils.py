@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.signal import butter, sosfiltfilt
 
+from bender.sound import DEFAULT_BLOCK_SIZE, SAMPLE_DTYPE
+
 
 def pad_reshape(data: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
     assert data.ndim == 1, "data must be 1D"
@@ -19,14 +21,24 @@ def pad_reshape(data: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
 def lowpass(data: np.ndarray, cutoff: float, sampling_rate: float, order: int = 6) -> np.ndarray:
     normal_cutoff = 2 * cutoff / sampling_rate
     sos = butter(order, normal_cutoff, btype="low", output="sos", analog=False)
-    return sosfiltfilt(sos, data)
+    # filter in the dtype of the data, float64 coefficients would promote the output
+    return sosfiltfilt(sos.astype(data.dtype, copy=False), data)
 
 
 def _get_carriers(n: int, cf: float, sr: float) -> tuple[np.ndarray, np.ndarray]:
-    t = np.linspace(0, n / sr, n)
+    # time points are spaced as np.linspace(0, n / sr, n), phases are computed in float64
+    # block by block to stay accurate for long signals, carriers are stored as SAMPLE_DTYPE
+    step = 2 * np.pi * cf * (n / sr) / max(n - 1, 1)
+
+    c1 = np.empty(n, dtype=SAMPLE_DTYPE)
+    c2 = np.empty(n, dtype=SAMPLE_DTYPE)
+
+    for offset in range(0, n, DEFAULT_BLOCK_SIZE):
+        end = min(offset + DEFAULT_BLOCK_SIZE, n)
+        phase = np.arange(offset, end, dtype=np.float64) * step
 
-    c1 = np.cos(2 * np.pi * cf * t)
-    c2 = np.sin(2 * np.pi * cf * t)
+        np.cos(phase, out=c1[offset:end])
+        np.sin(phase, out=c2[offset:end])
 
     return c1, c2
 
@@ -0,0 +1,198 @@
+import math
+from functools import lru_cache
+
+import numba
+import numpy as np
+
+INTERPOLATIONS = ["linear", "lagrange", "sinc"]
+DEFAULT_INTERPOLATION = "lagrange"
+
+# Number of fractional positions tabulated between two samples, coefficients for positions in
+# between are interpolated from the two nearest rows
+TABLE_RESOLUTION = 512
+
+# Taps and Kaiser window shape of the windowed sinc interpolator
+_SINC_TAPS = 8
+_SINC_BETA = 6.0
+
+
+def _check_interpolation(interpolation: str) -> None:
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(
+            f"Unknown interpolation: {interpolation}, expected one of {', '.join(INTERPOLATIONS)}"
+        )
+
+
+@lru_cache(len(INTERPOLATIONS))
+def get_table(interpolation: str) -> np.ndarray:
+    """
+    Build the table of interpolation coefficients. Row r holds the coefficients for a point r /
+    TABLE_RESOLUTION samples after sample k, applied to samples k - taps / 2 + 1 ... k + taps / 2.
+
+    :param interpolation: One of linear, lagrange (cubic) or sinc (windowed sinc).
+    :return: Read-only array of shape (TABLE_RESOLUTION + 1, taps).
+    """
+    _check_interpolation(interpolation)
+
+    fractions = np.linspace(0.0, 1.0, TABLE_RESOLUTION + 1)[:, None]
+
+    if interpolation == "linear":
+        table = np.hstack([1.0 - fractions, fractions])
+    elif interpolation == "lagrange":
+        offsets = np.arange(-1, 3)
+        table = np.ones((len(fractions), len(offsets)))
+        for j, offset in enumerate(offsets):
+            for other in offsets[offsets != offset]:
+                table[:, j] *= (fractions[:, 0] - other) / (offset - other)
+    else:
+        # Distance from every tap to the point
+        x = fractions - np.arange(-_SINC_TAPS // 2 + 1, _SINC_TAPS // 2 + 1)
+        window = np.i0(_SINC_BETA * np.sqrt(np.clip(1.0 - (x / (_SINC_TAPS // 2)) ** 2, 0, 1)))
+        table = np.sinc(x) * window / np.i0(_SINC_BETA)
+        # Unit gain at DC for every fraction
+        table /= table.sum(axis=1, keepdims=True)
+
+    table.flags.writeable = False
+    return table
+
+
+def allocate(max_delay: float, table: np.ndarray, count: int = 1) -> np.ndarray:
+    """
+    Allocate circular buffers for delay lines.
+
+    :param max_delay: Maximum delay in samples.
+    :param table: Interpolation table from get_table.
+    :param count: Number of delay lines.
+    :return: Zeroed array of shape (count, size), where the size is a power of two with room
+        for the longest delay and the interpolation taps around it.
+    """
+    size = 1 << int(math.ceil(max_delay) + table.shape[1] + 1).bit_length()
+    return np.zeros((count, size), dtype=np.float64)
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def delay_write(buffer: np.ndarray, index: int, value: float) -> None:
+    """
+    Write a sample to a delay line.
+
+    :param buffer: Circular buffer of the delay line, the length is a power of two.
+    :param index: Index of the sample in the whole signal.
+    :param value: Sample value.
+    """
+    buffer[index & (len(buffer) - 1)] = value
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def delay_read(buffer: np.ndarray, newest: int, delay: float, table: np.ndarray) -> float:
+    """
+    Read a delay line at a fractional delay. Taps after the newest sample are not written yet
+    and are skipped, samples before the start of the signal are silent.
+
+    :param buffer: Circular buffer of the delay line, the length is a power of two.
+    :param newest: Index of the newest written sample in the whole signal.
+    :param delay: Delay in samples from the newest sample, not negative.
+    :param table: Interpolation table from get_table.
+    :return: Interpolated sample.
+    """
+    mask = len(buffer) - 1
+    taps = table.shape[1]
+
+    point = newest - delay
+    k = math.floor(point)
+    position = (point - k) * (table.shape[0] - 1)
+    row = int(position)
+    weight = position - row
+
+    # Integer delays need no interpolation, the row of the zero fraction is a unit impulse
+    if weight == 0.0 and row == 0:
+        return buffer[k & mask]
+
+    first = k - taps // 2 + 1
+    result = 0.0
+    for j in range(min(taps, newest - first + 1)):
+        coefficient = table[row, j] + weight * (table[row + 1, j] - table[row, j])
+        result += coefficient * buffer[(first + j) & mask]
+
+    return result
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _delay_block(
+    buffer: np.ndarray,
+    state: np.ndarray,
+    block: np.ndarray,
+    delay: np.ndarray,
+    max_delay: float,
+    table: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    written = state[0]
+
+    for i in range(len(block)):
+        d = delay[i] if len(delay) > 1 else delay[0]
+        d = min(max(d, 0.0), max_delay)
+
+        delay_write(buffer, written + i, block[i])
+        out[i] = delay_read(buffer, written + i, d, table)
+
+    state[0] = written + len(block)
+
+
+class DelayLine:
+    """
+    Fractional delay line that keeps its state between blocks, for effects with modulated
+    delay times such as delays, choruses or flangers. Numba kernels can use the buffer and the
+    table directly with delay_write and delay_read, or allocate buffers for several lines.
+    """
+
+    def __init__(self, max_delay: float, interpolation: str = DEFAULT_INTERPOLATION) -> None:
+        """
+        Initialize a DelayLine instance.
+
+        :param max_delay: Maximum delay in samples.
+        :param interpolation: One of linear, lagrange (cubic) or sinc (windowed sinc).
+        """
+        if max_delay < 0:
+            raise ValueError("max_delay cannot be negative")
+
+        self.max_delay = float(max_delay)
+        self.table = get_table(interpolation)
+        self.buffer = allocate(max_delay, self.table)[0]
+
+        # Number of samples written so far
+        self._state = np.zeros(1, dtype=np.int64)
+
+    def process(
+        self, block: np.ndarray, delay: float | np.ndarray, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Write a block to the delay line and read it back delayed.
+
+        :param block: A 1D numpy array of samples.
+        :param delay: Delay in samples for every sample of the block, or a constant delay.
+            Delays are clamped between 0 and max_delay.
+        :param out: Output buffer of the same length as the block, allocated if not given.
+        :return: A 1D numpy array of delayed samples.
+        """
+        delay = np.atleast_1d(np.asarray(delay, dtype=np.float64))
+        if len(delay) not in (1, len(block)):
+            raise ValueError("delay must be a constant or have a value for every sample")
+
+        if out is None:
+            out = np.empty(len(block), dtype=np.result_type(block.dtype, np.float32))
+
+        _delay_block(self.buffer, self._state, block, delay, self.max_delay, self.table, out)
+
+        return out
+
+
+def warmup() -> None:
+    """
+    Compile the delay line kernels for constant and modulated delays.
+    """
+    block = np.zeros(256, dtype=np.float32)
+
+    for interpolation in INTERPOLATIONS:
+        line = DelayLine(64, interpolation)
+        line.process(block, 10.5)
+        line.process(block, np.full(len(block), 10.5, dtype=np.float32))
@@ -1,10 +1,91 @@
+from typing import Iterable, Iterator
+
 import numba
 import numpy as np
+from numexpr import evaluate
 
 from bender.modulation import Modulation
+from bender.sound import SAMPLE_DTYPE
+
+# Number of stacked one-pole release filters
+_N_RELEASES = 4
+
+# Number of steps of the staircase approximation of the attack smoothing kernel
+_ATTACK_STEPS = 16
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def sliding_min(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Running minimum over a window looking ahead of every sample, computed with the
+    van Herk/Gil-Werman algorithm in O(n) regardless of the window size. The window is truncated
+    at the end of the signal.
+
+    :param values: Input values.
+    :param window: Window size in samples.
+    :return: Array where element i is the minimum of values[i : i + window].
+    """
+    n = len(values)
+    result = np.empty_like(values)
+    if window <= 1 or n == 0:
+        result[:] = values
+        return result
+
+    # Prefix minimums from the start and suffix minimums to the end of each block of window size
+    prefix = np.empty_like(values)
+    suffix = np.empty_like(values)
+
+    for start in range(0, n, window):
+        end = min(start + window, n)
+
+        prefix[start] = values[start]
+        for i in range(start + 1, end):
+            prefix[i] = min(prefix[i - 1], values[i])
+
+        suffix[end - 1] = values[end - 1]
+        for i in range(end - 2, start - 1, -1):
+            suffix[i] = min(suffix[i + 1], values[i])
+
+    # Window [i, i + window) covers the end of the block of i and the start of the next block
+    for i in range(n):
+        last = min(i + window, n) - 1
+        if last // window == i // window:
+            result[i] = suffix[i]
+        else:
+            result[i] = min(suffix[i], prefix[last])
 
+    return result
 
-@numba.jit(nopython=True)
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def attack_boxes(attack_samples: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate the sigmoid attack smoothing kernel by a staircase of at most _ATTACK_STEPS
+    steps, where every step is the mean of the kernel over it, so the gain at DC stays 1. The
+    staircase is a sum of boxes over the newest samples, and the sum over a box is the difference
+    of two prefix sums, so smoothing takes the same time for any attack time.
+
+    :param attack_samples: Length of the kernel.
+    :return: Lengths of the boxes, the last one is the length of the kernel, and their weights.
+    """
+    kernel = 1 / (1 + np.exp(np.linspace(-2, 2, attack_samples)))
+    kernel /= np.sum(kernel)
+
+    steps = min(_ATTACK_STEPS, attack_samples)
+    lengths = np.empty(steps, dtype=np.int64)
+    means = np.zeros(steps + 1)
+
+    start = 0
+    for i in range(steps):
+        lengths[i] = (i + 1) * attack_samples // steps
+        means[i] = np.mean(kernel[start : lengths[i]])
+        start = lengths[i]
+
+    # The kernel decreases, so the weights of the boxes are not negative
+    return lengths, means[:-1] - means[1:]
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
 def brick_wall_limit(
     signal: np.ndarray,
     sample_rate: int,
@@ -23,41 +104,45 @@ def brick_wall_limit(
     :return: Processed audio signal with limiting applied.
     """
     n_releases = 4
-    attack_samples = int(attack_time * sample_rate)
+    attack_samples = max(int(attack_time * sample_rate), 2)
     if attack_samples % 2 != 0:
         attack_samples += 1
-    attack_samples_2 = attack_samples // 2
     release_samples = int(release_time / n_releases / 2.5 * sample_rate)
 
     signal_length = len(signal)
 
     # Calculate gain reduction based on threshold
-    gain_reduction = np.ones(signal_length)
+    gain_reduction = np.ones(signal_length, dtype=signal.dtype)
     for i in range(signal_length):
         level = abs(signal[i])
         if level > threshold:
             gain_reduction[i] = threshold / level
 
     # Apply look-ahead: find minimum gain in future window
-    hold_gain = np.ones(signal_length)
+    hold_gain = sliding_min(gain_reduction, attack_samples)
+
+    # Smooth gain reduction, the held gains are reflected at the start of the signal
+    lengths, weights = attack_boxes(attack_samples)
+    prefix = np.zeros(signal_length + 1)
     for i in range(signal_length):
-        hold_gain[i] = np.min(gain_reduction[i : i + attack_samples])
+        prefix[i + 1] = prefix[i] + hold_gain[i]
 
-    # Smooth gain reduction
-    attack_kernel = 1 / (1 + np.exp(np.linspace(-2, 2, attack_samples)))
-    attack_kernel /= np.sum(attack_kernel)
-    padded_gain = np.hstack(
-        (hold_gain[:attack_samples][::-1], hold_gain, hold_gain[-attack_samples:][::-1])
-    )
-    smoothed_gain = np.convolve(padded_gain, attack_kernel, mode="same")[
-        attack_samples_2 : -3 * attack_samples_2
-    ]
+    smoothed_gain = np.empty(signal_length, dtype=signal.dtype)
+    for i in range(signal_length):
+        smoothed = 0.0
+        for k in range(len(lengths)):
+            first = i - lengths[k]
+            total = prefix[i] - prefix[max(first, 0)]
+            if first < 0:
+                total += prefix[min(-first, signal_length)]
+            smoothed += weights[k] * total
+        smoothed_gain[i] = smoothed
 
     # Apply stacked release
     release_states = [1.0] * n_releases
     release_slew = 1.0 - np.exp(-1.0 / release_samples)
 
-    release_gain = np.ones(signal_length)
+    release_gain = np.ones(signal_length, dtype=signal.dtype)
     for i in range(signal_length):
         release_states[0] += (smoothed_gain[i] - release_states[0]) * release_slew
         release_states[0] = min(release_states[0], smoothed_gain[i])
@@ -69,31 +154,344 @@ def brick_wall_limit(
     return release_gain * signal
 
 
+def _limiter_parameters(
+    sample_rate: int, attack_time: float, release_time: float
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Get the attack smoothing boxes and the release slew of the linked limiter, rounded the same
+    way as in brick_wall_limit.
+
+    :param sample_rate: Sample rate of the audio signal in Hz.
+    :param attack_time: Attack time in seconds.
+    :param release_time: Release time in seconds.
+    :return: Lengths and weights of the attack boxes, the longest box is the lookahead in samples,
+        and release slew.
+    """
+    attack_samples = max(int(attack_time * sample_rate), 2)
+    if attack_samples % 2 != 0:
+        attack_samples += 1
+    release_samples = int(release_time / _N_RELEASES / 2.5 * sample_rate)
+
+    if release_samples <= 0:
+        raise ValueError("Release time is too short for the sample rate")
+
+    return *attack_boxes(attack_samples), 1.0 - np.exp(-1.0 / release_samples)
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _limit_kernel(
+    block: np.ndarray,
+    out: np.ndarray,
+    flush: bool,
+    threshold: float,
+    attack_lengths: np.ndarray,
+    attack_weights: np.ndarray,
+    release_slew: float,
+    counters: np.ndarray,
+    deque_index: np.ndarray,
+    deque_value: np.ndarray,
+    prefix: np.ndarray,
+    frames: np.ndarray,
+    release_states: np.ndarray,
+) -> int:
+    """
+    Limit a block of frames in a single pass with a gain shared by all channels. Frames are
+    delayed by the lookahead, so the output lags behind the input, and the remaining frames are
+    written when flushing.
+
+    :param block: Input frames of shape (n, channels).
+    :param out: Output buffer of shape (m, channels), can be the input block.
+    :param flush: Write all remaining frames as if the signal ended after this block.
+    :param threshold: Threshold level for limiting.
+    :param attack_lengths: Lengths of the gain smoothing boxes.
+    :param attack_weights: Weights of the gain smoothing boxes.
+    :param release_slew: Slew of the release filters.
+    :return: Number of frames written to out.
+    """
+    attack = attack_lengths[-1]
+    channels = frames.shape[1]
+    frames_in, gains_in, frames_out, start, length = counters
+    written = 0
+
+    i = 0
+    while True:
+        if i < len(block):
+            # Gain reduction from the loudest channel
+            level = 0.0
+            for c in range(channels):
+                level = max(level, abs(block[i, c]))
+                frames[frames_in % len(frames), c] = block[i, c]
+            gain = threshold / level if level > threshold else 1.0
+            frames_in += 1
+            i += 1
+        elif flush and frames_out < frames_in:
+            # The lookahead window is truncated at the end of the signal
+            gain = 1.0
+        else:
+            break
+
+        # Look-ahead: keep increasing minimums of the window in a deque
+        t = gains_in
+        gains_in += 1
+        while length > 0 and deque_index[start] <= t - attack:
+            start = (start + 1) % attack
+            length -= 1
+        while length > 0 and deque_value[(start + length - 1) % attack] >= gain:
+            length -= 1
+        deque_index[(start + length) % attack] = t
+        deque_value[(start + length) % attack] = gain
+        length += 1
+
+        j = t - attack + 1
+        if j < 0:
+            continue
+
+        # Prefix sums of the held gains, the last attack + 1 are kept
+        prefix[(j + 1) % len(prefix)] = prefix[j % len(prefix)] + deque_value[start]
+        if j < attack - 1:
+            continue
+
+        # Smooth gain reduction, the held gains are reflected at the start of the signal, so the
+        # first frames are written once the first attack samples of held gain are known
+        for s in range(0 if j == attack - 1 else j + 1, j + 2):
+            if frames_out >= frames_in:
+                break
+
+            smoothed = 0.0
+            for k in range(len(attack_lengths)):
+                first = s - attack_lengths[k]
+                total = prefix[s % len(prefix)] - prefix[max(first, 0) % len(prefix)]
+                if first < 0:
+                    total += prefix[-first % len(prefix)]
+                smoothed += attack_weights[k] * total
+
+            # Apply stacked release
+            release_states[0] += (smoothed - release_states[0]) * release_slew
+            release_states[0] = min(release_states[0], smoothed)
+            for r in range(1, len(release_states)):
+                release_states[r] += (release_states[r - 1] - release_states[r]) * release_slew
+                release_states[r] = min(release_states[r], smoothed)
+
+            for c in range(channels):
+                out[written, c] = frames[frames_out % len(frames), c] * release_states[-1]
+            frames_out += 1
+            written += 1
+
+    counters[:] = (frames_in, gains_in, frames_out, start, length)
+    return written
+
+
+class Limiter:
+    """
+    Stateful version of linked_limit that limits a signal block by block. The lookahead buffer
+    and release states are carried between blocks, so a signal of any length is limited in
+    constant memory, and the concatenated output is identical to linked_limit on the whole
+    signal. The output lags behind the input by up to twice the attack time, the remaining frames
+    are returned by flush.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        sample_rate: int,
+        attack_time: float = 0.001,
+        release_time: float = 0.05,
+        threshold: float = 1.0,
+    ) -> None:
+        """
+        Initialize a Limiter instance.
+
+        :param channels: Number of channels.
+        :param sample_rate: Sample rate of the audio signal in Hz.
+        :param attack_time: Attack time in seconds.
+        :param release_time: Release time in seconds.
+        :param threshold: Threshold level for limiting.
+        """
+        self.channels = channels
+        self.threshold = threshold
+        self._attack_lengths, self._attack_weights, self._release_slew = _limiter_parameters(
+            sample_rate, attack_time, release_time
+        )
+
+        attack_samples = self._attack_lengths[-1]
+        self._state = (
+            # frames in, gains in, frames out, deque start, deque length
+            np.zeros(5, dtype=np.int64),
+            np.zeros(attack_samples, dtype=np.int64),
+            np.zeros(attack_samples, dtype=np.float64),
+            np.zeros(attack_samples + 1, dtype=np.float64),
+            np.zeros((2 * attack_samples, channels), dtype=SAMPLE_DTYPE),
+            np.ones(_N_RELEASES, dtype=np.float64),
+        )
+
+    def _run(self, block: np.ndarray, out: np.ndarray | None, flush: bool) -> np.ndarray:
+        if block.ndim != 2 or block.shape[1] != self.channels:
+            raise ValueError(f"Expected block of shape (n, {self.channels}), got {block.shape}")
+
+        if out is None:
+            # At most the whole block and the delayed frames are written
+            out = np.empty((len(block) + len(self._state[4]), self.channels), dtype=SAMPLE_DTYPE)
+
+        written = _limit_kernel(
+            block,
+            out,
+            flush,
+            self.threshold,
+            self._attack_lengths,
+            self._attack_weights,
+            self._release_slew,
+            *self._state,
+        )
+
+        return out[:written]
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Limit the next block of the signal.
+
+        :param block: Input frames of shape (n, channels).
+        :return: Limited frames that are ready, might be fewer than the input frames.
+        """
+        return self._run(block, None, False)
+
+    def flush(self) -> np.ndarray:
+        """
+        End the signal and return the remaining delayed frames.
+
+        :return: Limited frames that were not returned yet.
+        """
+        return self._run(np.empty((0, self.channels), dtype=SAMPLE_DTYPE), None, True)
+
+    def stream(self, blocks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """
+        Limit a sequence of blocks and flush at the end.
+
+        :param blocks: Blocks of shape (n, channels).
+        :return: Iterator of limited non-empty blocks.
+        """
+        for block in blocks:
+            if len(result := self.process(block)) > 0:
+                yield result
+
+        if len(result := self.flush()) > 0:
+            yield result
+
+
+def linked_limit(
+    data: np.ndarray,
+    sample_rate: int,
+    attack_time: float = 0.001,
+    release_time: float = 0.05,
+    threshold: float = 1.0,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    A brick wall limiter with a single gain shared by all channels, so that the stereo image does
+    not shift when one channel is limited. All channels are read and written in one pass without
+    full-length intermediate arrays.
+
+    :param data: Input audio signal of shape (n, channels).
+    :param sample_rate: Sample rate of the audio signal in Hz.
+    :param attack_time: Attack time in seconds.
+    :param release_time: Release time in seconds.
+    :param threshold: Threshold level for limiting.
+    :param out: Optional float32 output buffer of the same shape, can be the input itself.
+    :return: Processed audio signal with limiting applied.
+    """
+    if data.ndim != 2:
+        raise ValueError(f"Expected data of shape (n, channels), got {data.shape}")
+
+    if out is None:
+        out = np.empty(data.shape, dtype=SAMPLE_DTYPE)
+    elif out.shape != data.shape or out.dtype != SAMPLE_DTYPE:
+        raise ValueError(f"Output buffer must be {SAMPLE_DTYPE} of shape {data.shape}")
+
+    limiter = Limiter(data.shape[1], sample_rate, attack_time, release_time, threshold)
+    return limiter._run(data, out, True)
+
+
 def mix(
     dry: np.ndarray,
     wet: np.ndarray,
     sample_rate: int,
     mix: Modulation = Modulation(0.5),
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
     """
-    Mix two audio signals using a modulated dry/wet amount.
+    Mix two audio signals using a modulated dry/wet amount. The mix is computed in a single
+    fused pass without padding the shorter signal, the missing samples are treated as silence.
 
     :param dry: Dry audio signal
     :param wet: Wet audio signal
     :param mix: Amount of the wet signal (1.0 = all wet, 0.0 = all dry)
+    :param out: Optional output buffer with the length of the longer signal, can be dry or wet
     :return: Mixed audio signal
     """
-    if mix == Modulation(0.0):
-        return dry
+    length = max(len(dry), len(wet))
+    common = min(len(dry), len(wet))
+
+    if out is not None and out.shape != (length,):
+        raise ValueError(f"Output buffer must have shape ({length},), got {out.shape}")
+
+    if mix.constant is not None:
+        # Constant value clamped to the constraints of the modulation
+        m = mix(np.zeros(1))[0]
+
+        if out is None:
+            if m == 0.0:
+                return dry
+            if m == 1.0:
+                return wet
+            out = np.empty(length, dtype=np.result_type(dry, wet))
+
+        m = out.dtype.type(m)
+    else:
+        m = mix.like(dry if len(dry) >= len(wet) else wet, sample_rate)
+
+        if out is None:
+            out = np.empty(length, dtype=np.result_type(dry, wet))
 
-    if mix == Modulation(1.0):
-        return wet
+    evaluate(
+        "(1 - m) * dry + m * wet",
+        local_dict={
+            "m": m if np.ndim(m) == 0 else m[:common],
+            "dry": dry[:common],
+            "wet": wet[:common],
+        },
+        global_dict={},
+        out=out[:common],
+        casting="unsafe",
+    )
+
+    # Only one of the signals continues after the end of the other one
+    if len(dry) > common:
+        evaluate(
+            "(1 - m) * dry",
+            local_dict={"m": m if np.ndim(m) == 0 else m[common:], "dry": dry[common:]},
+            global_dict={},
+            out=out[common:],
+            casting="unsafe",
+        )
+    elif len(wet) > common:
+        np.multiply(wet[common:], m if np.ndim(m) == 0 else m[common:], out=out[common:])
+
+    return out
 
-    if len(dry) < len(wet):
-        dry = np.pad(dry, (0, len(wet) - len(dry)), mode="constant")
-    elif len(wet) < len(dry):
-        wet = np.pad(wet, (0, len(dry) - len(wet)), mode="constant")
 
-    mix_value = mix.like(dry, sample_rate)
+def warmup() -> None:
+    """
+    Compile the limiter kernels for the argument types used when processing sounds. Kernels are
+    cached on disk, so later runs load them instead of compiling.
+    """
+    data = np.zeros((256, 2), dtype=SAMPLE_DTYPE)
+    readonly = data.copy()
+    readonly.flags.writeable = False
+
+    for buffer in (data, readonly):
+        # Contiguous signals and channel views of interleaved buffers
+        for signal in (np.ascontiguousarray(buffer[:, 0]), buffer[:, 0]):
+            brick_wall_limit(signal, 48000)
+            brick_wall_limit(signal, 48000, 0.001, 0.05, 1.0)
 
-    return (1 - mix_value) * dry + mix_value * wet
+        linked_limit(buffer, 48000)
+        list(Limiter(2, 48000).stream([buffer]))
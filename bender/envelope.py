@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+_ENVELOPE_PATTERN = re.compile(r"^env\((?P<points>.*)\)$", re.DOTALL)
+
+# Curves closer to zero than this are treated as linear
+_LINEAR_CURVE = 1e-6
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """
+    Breakpoint envelope defined by sparse (time, value, curve) points. The value is held before
+    the first and after the last point. The curve of a point shapes the segment that ends at it,
+    0 is linear, positive curves start slowly and negative curves start quickly.
+    """
+
+    times: tuple[float, ...]
+    values: tuple[float, ...]
+    curves: tuple[float, ...]
+
+    def __post_init__(self) -> None:
+        if not self.times:
+            raise ValueError("Envelope must have at least one point")
+
+        if not len(self.times) == len(self.values) == len(self.curves):
+            raise ValueError("Envelope times, values and curves must have the same length")
+
+        if any(t1 <= t0 for t0, t1 in zip(self.times, self.times[1:])):
+            raise ValueError("Envelope times must be strictly increasing")
+
+    @classmethod
+    def parse(cls, text: str) -> "Envelope | None":
+        """
+        Parse an envelope of the form env(time:value[:curve], ...), e.g.
+        env(0:0, 1:1:-4, 2.5:0.3).
+
+        :param text: Text to parse.
+        :return: Parsed envelope, or None if the text is not an envelope.
+        """
+        if (match := _ENVELOPE_PATTERN.match(text.strip())) is None:
+            return None
+
+        times, values, curves = [], [], []
+        for point in match.group("points").split(","):
+            fields = point.split(":")
+            if len(fields) not in (2, 3):
+                raise ValueError(f"Invalid envelope point {point.strip()!r}, expected time:value")
+
+            try:
+                numbers = [float(field) for field in fields]
+            except ValueError:
+                raise ValueError(f"Invalid envelope point {point.strip()!r}") from None
+
+            times.append(numbers[0])
+            values.append(numbers[1])
+            curves.append(numbers[2] if len(numbers) == 3 else 0.0)
+
+        return cls(tuple(times), tuple(values), tuple(curves))
+
+    def __call__(self, t: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the envelope at given time points.
+
+        :param t: A 1D numpy array of time points.
+        :return: A 1D numpy array of envelope values.
+        """
+        times = np.asarray(self.times)
+        values = np.asarray(self.values)
+
+        # Fast path for linear envelopes
+        if all(abs(curve) < _LINEAR_CURVE for curve in self.curves[1:]):
+            return np.interp(t, times, values)
+
+        if len(t) > 1 and np.all(t[1:] >= t[:-1]):
+            return self._evaluate_sorted(t)
+
+        segment = np.clip(np.searchsorted(times, t, side="right") - 1, 0, len(times) - 2)
+        start, end = times[segment], times[segment + 1]
+        x = np.clip((t - start) / (end - start), 0.0, 1.0)
+
+        curve = np.asarray(self.curves)[segment + 1]
+        linear = np.abs(curve) < _LINEAR_CURVE
+        curve = np.where(linear, 1.0, curve)
+        shaped = np.where(linear, x, np.expm1(curve * x) / np.expm1(curve))
+
+        return values[segment] + (values[segment + 1] - values[segment]) * shaped
+
+    def _evaluate_sorted(self, t: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the envelope at increasing time points segment by segment, each segment is
+        a contiguous slice of the time points, so no per-sample segment lookup is needed.
+
+        :param t: A 1D numpy array of increasing time points.
+        :return: A 1D numpy array of envelope values.
+        """
+        result = np.empty(len(t), dtype=np.float64)
+        bounds = np.searchsorted(t, self.times, side="left")
+
+        # Hold the first and the last value outside of the points
+        result[: bounds[0]] = self.values[0]
+        result[bounds[-1] :] = self.values[-1]
+
+        for i in range(len(self.times) - 1):
+            a, b = bounds[i], bounds[i + 1]
+            if a == b:
+                continue
+
+            start, end = self.times[i], self.times[i + 1]
+            v0, v1, curve = self.values[i], self.values[i + 1], self.curves[i + 1]
+
+            out = result[a:b]
+            np.subtract(t[a:b], start, out=out)
+            out *= 1.0 / (end - start)
+
+            if abs(curve) >= _LINEAR_CURVE:
+                out *= curve
+                np.expm1(out, out=out)
+                out *= 1.0 / np.expm1(curve)
+
+            out *= v1 - v0
+            out += v0
+
+        return result
@@ -0,0 +1,224 @@
+import math
+
+import numba
+import numpy as np
+
+from bender.modulation import Modulation
+from bender.sound import DEFAULT_BLOCK_SIZE, SAMPLE_DTYPE, Sound
+from bender.waveshaper import table_lookup
+
+# Operation codes of the fused kernel
+_GAIN = 0
+_TANH = 1
+_CLIP = 2
+_SHAPE = 3
+_MIX = 4
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _fused(
+    data: np.ndarray,
+    codes: np.ndarray,
+    constants: np.ndarray,
+    modulations: np.ndarray,
+    tables: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    """
+    Apply a chain of element-wise operations to a block. The operations run one after another on
+    the output block, which stays in cache, so the whole signal is only swept once.
+
+    :param data: Source frames of shape (n, channels).
+    :param codes: Operations of shape (k, 3): operation code, row of the modulation operand or -1
+        for a constant operand, and row of the transfer curve.
+    :param constants: Constant operands of shape (k, 2), the bounds of clip operations.
+    :param modulations: Modulation operands of shape (m, n), shared by all channels.
+    :param tables: Transfer curves of shape (t, table size).
+    :param out: C-contiguous output buffer of shape (n, channels) holding a copy of the source.
+    """
+    n, channels = data.shape
+
+    # Operations that do not depend on the frame run over the whole block at once
+    flat = out.reshape(n * channels)
+
+    for k in range(len(codes)):
+        code = codes[k, 0]
+        row = codes[k, 1]
+        a = constants[k, 0]
+        b = constants[k, 1]
+
+        if code == _GAIN and row < 0:
+            for j in range(len(flat)):
+                flat[j] *= a
+        elif code == _TANH:
+            for j in range(len(flat)):
+                flat[j] = math.tanh(flat[j])
+        elif code == _CLIP:
+            for j in range(len(flat)):
+                flat[j] = min(max(flat[j], a), b)
+        elif code == _SHAPE:
+            table = tables[codes[k, 2]]
+            for j in range(len(flat)):
+                flat[j] = table_lookup(table, flat[j])
+        elif code == _GAIN:
+            for i in range(n):
+                m = modulations[row, i]
+                for c in range(channels):
+                    out[i, c] *= m
+        else:
+            for i in range(n):
+                m = modulations[row, i] if row >= 0 else a
+                for c in range(channels):
+                    out[i, c] = (1.0 - m) * data[i, c] + m * out[i, c]
+
+
+class LazySound:
+    """
+    Records element-wise operations on a sound instead of running them one by one. When the
+    result is computed, the whole chain is applied by a single kernel block by block, so a chain
+    makes one pass over the samples and modulation operands are only evaluated for one block at
+    a time. Sounds with identical channels are processed once.
+    """
+
+    def __init__(
+        self,
+        sound: Sound,
+        operations: tuple[tuple[int, float, float, Modulation | None, np.ndarray | None], ...] = (),
+    ) -> None:
+        """
+        Initialize a LazySound instance.
+
+        :param sound: Source sound.
+        :param operations: Operations recorded so far, as operation code, constant operands,
+            modulation operand and transfer curve.
+        """
+        self.sound = sound
+        self._operations = operations
+
+    def _record(
+        self,
+        code: int,
+        a: float = 0.0,
+        b: float = 0.0,
+        modulation: Modulation | None = None,
+        table: np.ndarray | None = None,
+    ) -> "LazySound":
+        return LazySound(self.sound, self._operations + ((code, a, b, modulation, table),))
+
+    def _record_modulated(self, code: int, amount: float | str | Modulation) -> "LazySound":
+        modulation = Modulation(amount)
+
+        if modulation.constant is not None:
+            # Constant value clamped to the constraints of the modulation, a gain or mix of 1.0
+            # leaves the signal as it is
+            constant = float(modulation.block(0, 1, self.sound.sample_rate)[0])
+            return self if constant == 1.0 else self._record(code, constant)
+
+        return self._record(code, modulation=modulation)
+
+    def gain(self, amount: float | str | Modulation) -> "LazySound":
+        """
+        Multiply the signal by a gain factor.
+
+        :param amount: Gain factor, can be modulated.
+        :return: New LazySound with the operation recorded.
+        """
+        return self._record_modulated(_GAIN, amount)
+
+    def tanh(self) -> "LazySound":
+        """
+        Apply hyperbolic tangent saturation.
+
+        :return: New LazySound with the operation recorded.
+        """
+        return self._record(_TANH)
+
+    def clip(self, min_value: float = -1.0, max_value: float = 1.0) -> "LazySound":
+        """
+        Clip the signal to the given range.
+
+        :param min_value: Lower bound.
+        :param max_value: Upper bound.
+        :return: New LazySound with the operation recorded.
+        """
+        if min_value > max_value:
+            raise ValueError("min_value cannot be greater than max_value")
+
+        return self._record(_CLIP, float(min_value), float(max_value))
+
+    def shape(self, table: np.ndarray) -> "LazySound":
+        """
+        Apply a tabulated transfer curve.
+
+        :param table: Transfer curve from waveshaper.make_table or waveshaper.get_table.
+        :return: New LazySound with the operation recorded.
+        """
+        if any(t is not None and t.shape != table.shape for *_, t in self._operations):
+            raise ValueError("Transfer curves of a chain must have the same size")
+
+        return self._record(_SHAPE, table=table)
+
+    def mix(self, amount: float | str | Modulation) -> "LazySound":
+        """
+        Mix the processed signal with the source sound.
+
+        :param amount: Amount of the processed signal (1.0 = all wet, 0.0 = all dry), can be
+            modulated.
+        :return: New LazySound with the operation recorded.
+        """
+        return self._record_modulated(_MIX, amount)
+
+    def compute(self, block_size: int = DEFAULT_BLOCK_SIZE) -> Sound:
+        """
+        Apply all recorded operations in a single pass.
+
+        :param block_size: Number of frames processed at once.
+        :return: New Sound object with the processed channels.
+        """
+        if not self._operations:
+            return self.sound
+
+        data = self.sound.data
+        sr = self.sound.sample_rate
+
+        codes = np.full((len(self._operations), 3), -1, dtype=np.int64)
+        constants = np.zeros((len(self._operations), 2), dtype=np.float64)
+        modulations: list[Modulation] = []
+        tables: list[np.ndarray] = []
+
+        for k, (code, a, b, modulation, table) in enumerate(self._operations):
+            codes[k, 0] = code
+            constants[k] = a, b
+            if modulation is not None:
+                codes[k, 1] = len(modulations)
+                modulations.append(modulation)
+            if table is not None:
+                codes[k, 2] = len(tables)
+                tables.append(table)
+
+        table_rows = np.array(tables, dtype=np.float64) if tables else np.zeros((0, 2))
+        result = np.empty(data.shape, dtype=SAMPLE_DTYPE)
+
+        for offset in range(0, len(data), block_size):
+            end = min(offset + block_size, len(data))
+            operands = np.empty((len(modulations), end - offset), dtype=SAMPLE_DTYPE)
+            for row, modulation in enumerate(modulations):
+                operands[row] = modulation.block(offset, end - offset, sr, len(data))
+
+            np.copyto(result[offset:end], data[offset:end])
+            _fused(data[offset:end], codes, constants, operands, table_rows, result[offset:end])
+
+        return Sound.from_array(result, sr, self.sound.filename, self.sound.channels)
+
+
+def warmup() -> None:
+    """
+    Compile the fused kernel for constant and modulated operands.
+    """
+    data = np.zeros((256, 2), dtype=SAMPLE_DTYPE)
+    table = np.zeros(3)
+
+    # Interleaved sounds and channel views of them
+    for sound in (Sound.from_array(data, 48000), Sound.from_array(data[:, :1], 48000, channels=1)):
+        LazySound(sound).gain(2.0).tanh().clip().shape(table).mix(0.5).compute()
+        LazySound(sound).gain("1 + t").mix("t").compute()
@@ -1,9 +1,183 @@
+import functools
+import math
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+import numba
 import numpy as np
-from numexpr import evaluate
+from numexpr.necompiler import NumExpr, getContext, getExprNames, getType
 
-from bender.sound import Sound
+from bender.envelope import Envelope
+from bender.periodicity import find_period
+from bender.sound import DEFAULT_BLOCK_SIZE, SAMPLE_DTYPE, Sound
 from bender.utils import clamp
 
+# Total bytes of evaluated modulation signals kept for identical like() calls, longer signals
+# are not kept
+MEMO_BYTES = 64 << 20
+
+# Wavetable points per cycle of the fastest periodic part of an expression
+WAVETABLE_RESOLUTION = 4096
+
+# Periodic expressions that would need a larger wavetable are evaluated directly
+MAX_WAVETABLE_SIZE = 1 << 20
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(expression: str, dtype: str) -> tuple[NumExpr, list[str], bool]:
+    """
+    Compile an expression once per process, so that repeated evaluations skip parsing and
+    validation.
+
+    :param expression: Sanitized numexpr expression of t and pi.
+    :param dtype: Dtype string of the time points.
+    :return: Compiled expression, names of its arguments and whether it uses VML functions.
+    """
+    context = getContext({"optimization": "aggressive", "truediv": True})
+    names, uses_vml = getExprNames(expression, context, sanitize=True)
+
+    types = {"t": getType(np.empty(0, dtype=dtype)), "pi": getType(np.asarray(np.pi))}
+    for name in names:
+        if name not in types:
+            raise ValueError(f"Unknown variable {name} in expression {expression}")
+
+    signature = [(name, types[name]) for name in names]
+    return NumExpr(expression, signature, sanitize=True, **context), names, uses_vml
+
+
+def _get_extent(x: list | np.ndarray | Sound, sr: int) -> tuple[int, float]:
+    """
+    Get the length and duration of a signal that a modulation is generated for.
+
+    :param x: A Sound object, numpy array, or list.
+    :param sr: Sample rate of arrays and lists.
+    :return: Number of samples and duration in seconds.
+    """
+    if isinstance(x, Sound):
+        return len(x), x.duration
+    elif isinstance(x, np.ndarray):
+        if x.ndim != 1:
+            raise ValueError("Input array must be 1D")
+        return len(x), len(x) / sr
+    elif isinstance(x, list):
+        return len(x), len(x) / sr
+
+    raise TypeError("Input must be a Sound, numpy array, or list")
+
+
+def _get_step(length: int, duration: float) -> float:
+    # time points are spaced as np.linspace(0, duration, num=length)
+    return duration / (length - 1) if length > 1 else 0.0
+
+
+@functools.lru_cache(maxsize=64)
+def _get_wavetable(modulation: "Modulation") -> tuple[np.ndarray, float] | None:
+    """
+    Evaluate one period of a periodic modulation into a table.
+
+    :param modulation: Modulation to evaluate.
+    :return: Table of values over one period including both ends and the period in seconds, or
+        None if the modulation is not periodic or its table would be too large.
+    """
+    if (found := find_period(modulation._expression)) is None:
+        return None
+
+    period, highest_frequency = found
+    size = math.ceil(period * highest_frequency) * WAVETABLE_RESOLUTION
+    if size > MAX_WAVETABLE_SIZE:
+        return None
+
+    table = modulation(np.arange(size + 1, dtype=np.float64) * (period / size))
+    return table, period
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _wavetable_lookup(
+    table: np.ndarray, start: int, size: int, step: float, period: float
+) -> np.ndarray:
+    """
+    Evaluate a periodic modulation from its wavetable with linear interpolation.
+
+    :param table: Values over one period including both ends.
+    :param start: Index of the first sample.
+    :param size: Number of samples.
+    :param step: Time between samples in seconds.
+    :param period: Period in seconds.
+    :return: A 1D array of modulation values.
+    """
+    n = len(table) - 1
+    scale = n / period
+    result = np.empty(size, dtype=table.dtype)
+
+    # The phase of every sample is computed from its index, so that the result does not depend
+    # on block boundaries
+    increment = step * scale
+
+    for i in range(size):
+        phase = (start + i) * increment
+        phase -= math.floor(phase / n) * n
+        k = min(int(phase), n - 1)
+        result[i] = table[k] + (table[k + 1] - table[k]) * (phase - k)
+
+    return result
+
+
+# Evaluated signals from least to most recently used, with the total size of the arrays
+_memo: OrderedDict[tuple["Modulation", int, float], np.ndarray] = OrderedDict()
+_memo_bytes = 0
+_memo_lock = threading.Lock()
+
+
+def _evaluate_like(modulation: "Modulation", length: int, duration: float) -> np.ndarray:
+    global _memo_bytes
+
+    key = (modulation, length, duration)
+    with _memo_lock:
+        if (result := _memo.get(key)) is not None:
+            _memo.move_to_end(key)
+            return result
+
+    step = _get_step(length, duration)
+    result = np.empty(length, dtype=SAMPLE_DTYPE)
+
+    for offset in range(0, length, DEFAULT_BLOCK_SIZE):
+        size = min(DEFAULT_BLOCK_SIZE, length - offset)
+        result[offset : offset + size] = modulation._evaluate_block(offset, size, step)
+
+    # The same array is returned to every caller
+    result.flags.writeable = False
+
+    if result.nbytes > MEMO_BYTES:
+        return result
+
+    with _memo_lock:
+        # Another thread may have evaluated the same signal meanwhile
+        if key in _memo:
+            return _memo[key]
+
+        _memo[key] = result
+        _memo_bytes += result.nbytes
+
+        while _memo_bytes > MEMO_BYTES:
+            _, evicted = _memo.popitem(last=False)
+            _memo_bytes -= evicted.nbytes
+
+    return result
+
+
+def clear_memo() -> None:
+    """
+    Release the memoized modulation signals and wavetables, e.g. after processing a long sound.
+    """
+    global _memo_bytes
+
+    with _memo_lock:
+        _memo.clear()
+        _memo_bytes = 0
+
+    _get_wavetable.cache_clear()
+
 
 class Modulation:
     def __init__(
@@ -11,22 +185,33 @@ class Modulation:
         expression: "float | str | Modulation",
         min_value: float | None = None,
         max_value: float | None = None,
+        control_period: int | None = None,
     ):
         """
         Initialize a Modulation instance.
 
-        :param expression: A mathematical expression as a string or a float.
+        :param expression: A mathematical expression as a string or a float, or a breakpoint
+            envelope of the form env(time:value[:curve], ...).
         :param min_value: Optional minimum value for the modulation.
         :param max_value: Optional maximum value for the modulation.
+        :param control_period: Optional number of samples between evaluations of the expression,
+            values in between are linearly interpolated. By default the expression is evaluated
+            for every sample. Copied from the expression if it is a Modulation.
         """
         if min_value is not None and max_value is not None and min_value > max_value:
             raise ValueError("min_value cannot be greater than max_value")
 
+        if control_period is not None and control_period <= 0:
+            raise ValueError("control_period must be positive")
+
         if isinstance(expression, Modulation):
+            if control_period is None:
+                control_period = expression._control_period
             expression = expression._expression
 
-        # Special case for constant modulation
+        # Special cases for constant modulation and breakpoint envelopes
         self._constant: float | None = None
+        self._envelope: Envelope | None = None
         self._expression: str
 
         if isinstance(expression, float):
@@ -40,7 +225,7 @@ class Modulation:
             try:
                 self._constant = float(expression)
             except ValueError:
-                pass
+                self._envelope = Envelope.parse(expression)
 
             self._expression = expression
         else:
@@ -48,6 +233,7 @@ class Modulation:
 
         self._min_value: float | None = min_value
         self._max_value: float | None = max_value
+        self._control_period: int | None = control_period
 
     def __eq__(self, other: object) -> bool:
         """
@@ -67,10 +253,19 @@ class Modulation:
             if self._constant is not None and other._constant is not None:
                 return self._constant == other._constant
 
-            return self._expression == other._expression
+            return (
+                self._expression == other._expression
+                and self._control_period == other._control_period
+            )
 
         return False
 
+    def __hash__(self) -> int:
+        if self._constant is not None:
+            return hash((self._constant, self._min_value, self._max_value))
+
+        return hash((self._expression, self._min_value, self._max_value, self._control_period))
+
     def with_constraints(
         self, min_value: float | None = None, max_value: float | None = None
     ) -> "Modulation":
@@ -81,12 +276,21 @@ class Modulation:
         :param max_value: New maximum value for the modulation.
         :return: A new Modulation instance with updated constraints.
         """
-        return Modulation(self._expression, min_value=min_value, max_value=max_value)
+        return Modulation(
+            self._expression,
+            min_value=min_value,
+            max_value=max_value,
+            control_period=self._control_period,
+        )
 
     @property
     def constant(self) -> float | None:
         return self._constant
 
+    @property
+    def control_period(self) -> int | None:
+        return self._control_period
+
     def __call__(self, t: np.ndarray) -> np.ndarray:
         """
         Evaluate the modulation expression at given time points.
@@ -103,51 +307,134 @@ class Modulation:
         # Fast path for constant modulation
         if self._constant is not None:
             c = clamp(self._constant, self._min_value, self._max_value)
-            return np.full_like(t, c, dtype=np.float32)
+            return np.full_like(t, c, dtype=SAMPLE_DTYPE)
 
-        result = evaluate(
-            self._expression,
-            local_dict={},
-            global_dict={"t": t, "pi": np.pi},
-            casting="unsafe",
-            sanitize=True,
-            optimization="aggressive",
-            truediv=True,
-        )
+        if self._envelope is not None:
+            result = self._envelope(t).astype(SAMPLE_DTYPE)
+        else:
+            # expression is evaluated in the precision of t, but the result is stored as
+            # SAMPLE_DTYPE
+            compiled, names, uses_vml = _compile(self._expression, t.dtype.str)
+            arguments = {"t": t, "pi": np.asarray(np.pi)}
+
+            result = np.empty(len(t), dtype=SAMPLE_DTYPE)
+            compiled(
+                *(arguments[name] for name in names),
+                out=result,
+                order="K",
+                casting="unsafe",
+                ex_uses_vml=uses_vml,
+            )
 
         if self._min_value is not None:
-            result = np.maximum(result, self._min_value)
+            np.maximum(result, self._min_value, out=result)
 
         if self._max_value is not None:
-            result = np.minimum(result, self._max_value)
+            np.minimum(result, self._max_value, out=result)
 
         return result
 
+    def _evaluate_block(self, start: int, size: int, step: float) -> np.ndarray:
+        """
+        Evaluate the modulation at evenly spaced time points. The time points are generated in
+        float64 to keep them accurate far into the signal, only the result is SAMPLE_DTYPE.
+        Periodic expressions are interpolated from a table of one period and modulations with
+        a control period are evaluated at control rate and interpolated.
+
+        :param start: Index of the first sample.
+        :param size: Number of samples.
+        :param step: Time between samples in seconds.
+        :return: A 1D array of modulation values.
+        """
+        if self._constant is not None:
+            c = clamp(self._constant, self._min_value, self._max_value)
+            return np.full(size, c, dtype=SAMPLE_DTYPE)
+
+        if self._control_period is None or size == 0:
+            # Periodic expressions are looked up from one evaluated period
+            if (wavetable := _get_wavetable(self)) is not None:
+                table, period = wavetable
+                return _wavetable_lookup(table, start, size, step, period)
+
+            return self(np.arange(start, start + size, dtype=np.float64) * step)
+
+        # Evaluate at multiples of the control period around the block and interpolate, the
+        # control points do not depend on the block boundaries
+        period = self._control_period
+        first = start // period
+        last = -(-(start + size - 1) // period)
+        points = np.arange(first, last + 1, dtype=np.float64) * period
+        values = self(points * step)
+
+        samples = np.arange(start, start + size, dtype=np.float64)
+        return np.interp(samples, points, values).astype(SAMPLE_DTYPE)
+
+    def block(self, start: int, size: int, sr: int, length: int | None = None) -> np.ndarray:
+        """
+        Evaluate a single block of a modulation signal, e.g. when processing a stream.
+
+        :param start: Index of the first sample of the block.
+        :param size: Number of samples in the block.
+        :param sr: Sample rate of the signal.
+        :param length: Length of the whole signal, if given the time points are the same as in
+            like(), otherwise sample i is at time i / sr.
+        :return: A 1D array of modulation values for the block.
+        """
+        if start < 0 or size < 0:
+            raise ValueError("Start and size of the block cannot be negative")
+
+        step = 1.0 / sr if length is None else _get_step(length, length / sr)
+        return self._evaluate_block(start, size, step)
+
+    def blocks(
+        self,
+        x: list | np.ndarray | Sound,
+        sr: int = 48000,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        start: int = 0,
+    ) -> Iterator[np.ndarray]:
+        """
+        Generate a modulation signal based on the input sound or array block by block, so that
+        the whole signal is never held in memory. The concatenated blocks are equal to like().
+
+        :param x: A Sound object, numpy array, or list to base the modulation on.
+        :param sr: Sample rate to use for time calculation, default is 48000.
+        :param block_size: Number of samples in each block.
+        :param start: Index of the sample to start at.
+        :return: Iterator of 1D arrays of modulation values.
+        """
+        if block_size <= 0:
+            raise ValueError("Block size must be positive")
+
+        length, duration = _get_extent(x, sr)
+        step = _get_step(length, duration)
+
+        for offset in range(start, length, block_size):
+            yield self._evaluate_block(offset, min(block_size, length - offset), step)
+
     def like(self, x: list | np.ndarray | Sound, sr: int = 48000) -> np.ndarray:
         """
-        Generate a modulation signal based on the input sound or array.
+        Generate a modulation signal based on the input sound or array. Recently evaluated
+        signals are memoized, so identical calls, e.g. for the left and right channels, are
+        computed once. The returned array can be shared between calls and is read-only.
 
         :param x: A Sound object, numpy array, or list to base the modulation on.
         :param sr: Sample rate to use for time calculation, default is 48000.
         :return: A 1D numpy array of modulation values.
         """
-        if isinstance(x, Sound):
-            duration = x.duration
-            length = len(x)
-        elif isinstance(x, np.ndarray):
-            if x.ndim != 1:
-                raise ValueError("Input array must be 1D")
-            duration = len(x) / sr
-            length = len(x)
-        elif isinstance(x, list):
-            duration = len(x) / sr
-            length = len(x)
-        else:
-            raise TypeError("Input must be a Sound, numpy array, or list")
+        length, duration = _get_extent(x, sr)
 
         # Fast path for constant modulation
         if self._constant is not None:
-            c = clamp(self._constant, self._min_value, self._max_value)
-            return np.full(length, c, dtype=np.float32)
+            result = self._evaluate_block(0, length, 0.0)
+            result.flags.writeable = False
+            return result
+
+        return _evaluate_like(self, length, duration)
+
 
-        return self(np.linspace(0, duration, num=length))
+def warmup() -> None:
+    """
+    Compile the wavetable kernel used for periodic modulations.
+    """
+    Modulation("sin(2 * pi * t)").like(np.zeros(16))
@@ -0,0 +1,211 @@
+import math
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+
+import numba
+import numpy as np
+
+from bender.sound import SAMPLE_DTYPE
+
+OVERSAMPLING_FACTORS = [1, 2, 4, 8]
+
+# Taps of the half-band filter of every 2x stage, from the base rate up. Only the first stage
+# has to separate the base band from its image closely, the later stages run at rates where
+# the signal has no content above the base Nyquist frequency, so they can be shorter.
+# Half-band filters have 4m + 3 taps.
+_STAGE_TAPS = (63, 23, 19)
+
+# Kaiser window shape of the half-band filters, about 80 dB of stopband attenuation
+_KAISER_BETA = 8.0
+
+
+@lru_cache(len(_STAGE_TAPS))
+def _half_band(taps: int) -> np.ndarray:
+    """
+    Design a half-band lowpass filter with a Kaiser window. Every other coefficient of such a
+    filter is zero and the center coefficient is 0.5, only the remaining even coefficients are
+    returned.
+
+    :param taps: Number of taps, 4m + 3.
+    :return: Read-only array of the 2m + 2 even coefficients.
+    """
+    if taps % 4 != 3:
+        raise ValueError(f"Half-band filter must have 4m + 3 taps, got {taps}")
+
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 0.5 * np.sinc(n / 2) * np.kaiser(taps, _KAISER_BETA)
+
+    # Unit gain at DC, the center coefficient stays 0.5
+    even = h[::2] * (0.5 / h[::2].sum())
+    even.flags.writeable = False
+    return even
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _upsample(x: np.ndarray, even: np.ndarray, out: np.ndarray) -> None:
+    """
+    Upsample by 2 with a half-band filter. The input starts with len(even) - 1 frames of
+    history, the even output frames are filtered by the even coefficients and the odd output
+    frames are the input delayed to the center of the filter.
+    """
+    history = len(even) - 1
+    center = history // 2
+
+    for j in range(len(x) - history):
+        newest = j + history
+        for c in range(x.shape[1]):
+            acc = 0.0
+            for i in range(len(even)):
+                acc += even[i] * x[newest - i, c]
+
+            out[2 * j, c] = 2.0 * acc
+            out[2 * j + 1, c] = x[newest - center, c]
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _downsample(x: np.ndarray, even: np.ndarray, out: np.ndarray) -> None:
+    """
+    Filter with a half-band filter and downsample by 2. The input starts with
+    2 * (len(even) - 1) frames of history and has an even number of new frames.
+    """
+    history = 2 * (len(even) - 1)
+    center = history // 2
+
+    for j in range(len(out)):
+        newest = 2 * j + history
+        for c in range(x.shape[1]):
+            acc = 0.5 * x[newest - center, c]
+            for i in range(len(even)):
+                acc += even[i] * x[newest - 2 * i, c]
+
+            out[j, c] = acc
+
+
+class Oversampler:
+    """
+    Runs a per-sample nonlinearity at a multiple of the sample rate, block by block, so that the
+    harmonics it adds above the Nyquist frequency are filtered out instead of aliasing back.
+    The signal is upsampled and downsampled by cascades of 2x half-band polyphase filters,
+    which keep their state between blocks. The filters delay the signal by latency frames, the
+    output is shifted back, so the concatenated output is aligned with the input, and the last
+    frames are returned by flush.
+    """
+
+    def __init__(self, factor: int, channels: int) -> None:
+        """
+        Initialize an Oversampler instance.
+
+        :param factor: Oversampling factor, one of 1, 2, 4 or 8.
+        :param channels: Number of channels.
+        """
+        if factor not in OVERSAMPLING_FACTORS:
+            raise ValueError(
+                f"Unknown oversampling factor: {factor}, expected one of "
+                f"{', '.join(map(str, OVERSAMPLING_FACTORS))}"
+            )
+
+        self.factor = factor
+        self.channels = channels
+        self._filters = [_half_band(taps) for taps in _STAGE_TAPS[: int(math.log2(factor))]]
+
+        # Every stage delays its rate by the center of the filter on the way up and again on the
+        # way down. A few extra frames at the highest rate round the total delay up to whole
+        # frames of the base rate.
+        delay = sum(
+            (len(even) - 1) * factor // 2**stage for stage, even in enumerate(self._filters)
+        )
+        self.latency = -(-delay // factor)
+        self._padding = self.latency * factor - delay
+
+        self._up_history = [np.zeros((len(even) - 1, channels)) for even in self._filters]
+        self._down_history = [np.zeros((2 * (len(even) - 1), channels)) for even in self._filters]
+        self._pending = np.zeros((self._padding, channels))
+
+        # Frames at the highest rate passed to the nonlinearity, and output frames to skip
+        self._position = 0
+        self._skip = self.latency
+
+    def _up(self, block: np.ndarray) -> np.ndarray:
+        for stage, even in enumerate(self._filters):
+            x = np.concatenate([self._up_history[stage], block])
+            block = np.empty((2 * (len(x) - len(self._up_history[stage])), self.channels))
+            _upsample(x, even, block)
+            self._up_history[stage] = x[len(x) - len(self._up_history[stage]) :]
+
+        return block
+
+    def _down(self, block: np.ndarray) -> np.ndarray:
+        if self._padding:
+            block = np.concatenate([self._pending, block])
+            self._pending = block[len(block) - self._padding :]
+            block = block[: len(block) - self._padding]
+
+        for stage in reversed(range(len(self._filters))):
+            x = np.concatenate([self._down_history[stage], block])
+            block = np.empty(((len(x) - len(self._down_history[stage])) // 2, self.channels))
+            _downsample(x, self._filters[stage], block)
+            self._down_history[stage] = x[len(x) - len(self._down_history[stage]) :]
+
+        return block
+
+    def _run(self, block: np.ndarray, fn: Callable[[np.ndarray, int], np.ndarray]) -> np.ndarray:
+        if block.ndim != 2 or block.shape[1] != self.channels:
+            raise ValueError(f"Expected block of shape (n, {self.channels}), got {block.shape}")
+
+        upsampled = self._up(block)
+        shaped = fn(upsampled, self._position)
+        self._position += len(upsampled)
+
+        result = self._down(np.asarray(shaped, dtype=np.float64))
+
+        skipped = min(self._skip, len(result))
+        self._skip -= skipped
+        return result[skipped:].astype(SAMPLE_DTYPE)
+
+    def process(self, block: np.ndarray, fn: Callable[[np.ndarray, int], np.ndarray]) -> np.ndarray:
+        """
+        Apply a nonlinearity to the next block of the signal at the oversampled rate.
+
+        :param block: Input frames of shape (n, channels).
+        :param fn: Function of an oversampled block of shape (factor * n, channels) and the
+            index of its first frame at the oversampled rate, returning the processed block.
+        :return: Processed frames that are ready, fewer than the input frames at the start.
+        """
+        return self._run(block, fn)
+
+    def flush(self, fn: Callable[[np.ndarray, int], np.ndarray]) -> np.ndarray:
+        """
+        End the signal and return the frames still in the filters.
+
+        :param fn: The nonlinearity passed to process.
+        :return: Processed frames that were not returned yet.
+        """
+        return self._run(np.zeros((self.latency, self.channels)), fn)
+
+    def stream(
+        self, blocks: Iterable[np.ndarray], fn: Callable[[np.ndarray, int], np.ndarray]
+    ) -> Iterator[np.ndarray]:
+        """
+        Apply a nonlinearity to a sequence of blocks at the oversampled rate and flush at the end.
+
+        :param blocks: Blocks of shape (n, channels).
+        :param fn: The nonlinearity, see process.
+        :return: Iterator of processed non-empty blocks.
+        """
+        for block in blocks:
+            if len(result := self.process(block, fn)) > 0:
+                yield result
+
+        if len(result := self.flush(fn)) > 0:
+            yield result
+
+
+def warmup() -> None:
+    """
+    Compile the resampling kernels.
+    """
+    block = np.zeros((256, 2), dtype=SAMPLE_DTYPE)
+
+    for factor in OVERSAMPLING_FACTORS:
+        oversampler = Oversampler(factor, 2)
+        list(oversampler.stream([block], lambda x, _: x))
@@ -153,12 +153,14 @@ class FloatParameter(MinMaxParameter[float]):
 @dataclass(frozen=True)
 class ModulationParameter(Parameter[Modulation]):
     """
-    Modulation parameter, parses the input as a modulation expression.
+    Modulation parameter, parses the input as a modulation expression or a breakpoint envelope.
     """
 
     kind = "modulation"
     min_value: float | None = None
     max_value: float | None = None
+    # evaluate the expression every control_period samples and interpolate in between
+    control_period: int | None = None
 
     @property
     def traits(self) -> list[str]:
@@ -167,10 +169,17 @@ class ModulationParameter(Parameter[Modulation]):
             traits.append(f"min: {self.min_value}")
         if self.max_value is not None:
             traits.append(f"max: {self.max_value}")
+        if self.control_period is not None:
+            traits.append(f"control period: {self.control_period}")
         return traits
 
     def parse(self, text: str) -> Modulation:
-        return Modulation(text, min_value=self.min_value, max_value=self.max_value)
+        return Modulation(
+            text,
+            min_value=self.min_value,
+            max_value=self.max_value,
+            control_period=self.control_period,
+        )
 
 
 def build_parameters(prototypes: dict[str, Parameter], values: dict[str, str]) -> dict[str, Any]:
@@ -0,0 +1,130 @@
+import ast
+import math
+from fractions import Fraction
+
+# Periodic functions and the period of their argument. tan is periodic too, but its poles would
+# be smeared by the interpolation of a wavetable, the same as the steps of the functions below.
+_PERIODIC_FUNCTIONS = {
+    "sin": 2 * math.pi,
+    "cos": 2 * math.pi,
+}
+
+# Functions with discontinuous values
+_DISCONTINUOUS_FUNCTIONS = {"where", "tan", "floor", "ceil", "sign"}
+
+# Largest denominator of frequency ratios when looking for a common period
+_MAX_DENOMINATOR = 1000
+
+
+def _linear(node: ast.expr) -> tuple[float, float] | None:
+    """
+    Find a and b for a node of the form a * t + b, where a and b are constant.
+
+    :param node: Expression node.
+    :return: Coefficients (a, b), or None if the node is not linear in t.
+    """
+    match node:
+        case ast.Constant(value=int() | float() as value) if not isinstance(value, bool):
+            return 0.0, float(value)
+        case ast.Name(id="pi"):
+            return 0.0, math.pi
+        case ast.Name(id="t"):
+            return 1.0, 0.0
+        case ast.UnaryOp(op=ast.USub() | ast.UAdd() as op, operand=operand):
+            if (inner := _linear(operand)) is None:
+                return None
+            sign = -1.0 if isinstance(op, ast.USub) else 1.0
+            return sign * inner[0], sign * inner[1]
+        case ast.BinOp(left=left, op=op, right=right):
+            if (lhs := _linear(left)) is None or (rhs := _linear(right)) is None:
+                return None
+            if isinstance(op, ast.Add):
+                return lhs[0] + rhs[0], lhs[1] + rhs[1]
+            if isinstance(op, ast.Sub):
+                return lhs[0] - rhs[0], lhs[1] - rhs[1]
+            if isinstance(op, ast.Mult) and lhs[0] == 0.0:
+                return lhs[1] * rhs[0], lhs[1] * rhs[1]
+            if isinstance(op, ast.Mult) and rhs[0] == 0.0:
+                return lhs[0] * rhs[1], lhs[1] * rhs[1]
+            if isinstance(op, ast.Div) and rhs[0] == 0.0 and rhs[1] != 0.0:
+                return lhs[0] / rhs[1], lhs[1] / rhs[1]
+
+    return None
+
+
+def _frequencies(node: ast.expr) -> set[float] | None:
+    """
+    Find the frequencies of the periodic parts of a continuous expression.
+
+    :param node: Expression node.
+    :return: Frequencies in Hz, empty for expressions that do not depend on t, or None if the
+        expression is not periodic in t or may be discontinuous.
+    """
+    match node:
+        case ast.Name(id="t"):
+            return None
+        case ast.Constant() | ast.Name():
+            return set()
+        case ast.Call(func=ast.Name(id=name), args=[argument]) if name in _PERIODIC_FUNCTIONS:
+            if (linear := _linear(argument)) is not None:
+                return {abs(linear[0]) / _PERIODIC_FUNCTIONS[name]} - {0.0}
+            # A function of a periodic expression has the same period
+            return _frequencies(argument)
+        case ast.Compare() | ast.BoolOp() | ast.BinOp(op=ast.Mod()):
+            # Steps would be smeared by the interpolation of a wavetable
+            return None
+        case ast.Call(func=ast.Name(id=name)) if name in _DISCONTINUOUS_FUNCTIONS:
+            return None
+        case ast.BinOp(op=ast.Div(), right=right) if _frequencies(right) != set():
+            # Dividing by a function of t can have poles
+            return None
+
+    # Any combination of periodic parts is periodic
+    frequencies: set[float] = set()
+    for child in ast.iter_child_nodes(node):
+        if isinstance(
+            child, ast.expr_context | ast.operator | ast.unaryop | ast.cmpop | ast.boolop
+        ):
+            continue
+        if not isinstance(child, ast.expr):
+            return None
+        if (child_frequencies := _frequencies(child)) is None:
+            return None
+        frequencies |= child_frequencies
+
+    return frequencies
+
+
+def find_period(expression: str) -> tuple[float, float] | None:
+    """
+    Detect if an expression of t is periodic, e.g. "0.5 + 0.3 * sin(2 * pi * 0.5 * t)". An
+    expression is periodic if t only appears in linear arguments of sin and cos, and the
+    frequencies of these parts have a common period. Expressions with comparisons, modulo,
+    where, tan or other discontinuous functions are not detected, interpolating between values
+    of such expressions would smooth their steps.
+
+    :param expression: Expression of t.
+    :return: Period in seconds and the highest frequency in Hz, or None if the expression is not
+        periodic or does not depend on t.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return None
+
+    frequencies = _frequencies(tree.body)
+    if not frequencies:
+        return None
+
+    # The frequencies must be integer multiples of a common fundamental frequency, which is
+    # found from their ratios to the lowest frequency
+    lowest = min(frequencies)
+    ratios = [Fraction(f / lowest).limit_denominator(_MAX_DENOMINATOR) for f in frequencies]
+    if not all(math.isclose(r, f / lowest, rel_tol=1e-9) for r, f in zip(ratios, frequencies)):
+        return None
+
+    denominator = math.lcm(*(ratio.denominator for ratio in ratios))
+    harmonics = math.gcd(*(int(ratio * denominator) for ratio in ratios))
+    fundamental = lowest * harmonics / denominator
+
+    return 1.0 / fundamental, max(frequencies)
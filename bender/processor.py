@@ -1,3 +1,5 @@
+import numpy as np
+
 from bender.sound import Sound
 
 
@@ -7,6 +9,10 @@ class Processor:
 
 
 class OneToOneProcessor(Processor):
+    # processors that handle every channel on its own set this and implement _process_channel,
+    # the channels are then processed concurrently
+    channel_independent: bool = False
+
     def process(self, sounds: list[Sound]) -> Sound:
         if not sounds:
             raise ValueError("No input sounds provided")
@@ -17,4 +23,12 @@ class OneToOneProcessor(Processor):
         return self._process(sounds[0])
 
     def _process(self, sound: Sound) -> Sound:
+        if self.channel_independent:
+            return sound.process(self._process_channel, parallel=True)
+
         raise NotImplementedError(f"_process is not implemented in {self.__class__.__name__}")
+
+    def _process_channel(self, signal: np.ndarray, sample_rate: int) -> np.ndarray:
+        raise NotImplementedError(
+            f"_process_channel is not implemented in {self.__class__.__name__}"
+        )
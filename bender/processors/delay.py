@@ -1,16 +1,128 @@
-import librosa.effects
+import numba
 import numpy as np
 
+from bender.delayline import (
+    DEFAULT_INTERPOLATION,
+    INTERPOLATIONS,
+    allocate,
+    delay_read,
+    delay_write,
+    get_table,
+)
 from bender.effects import mix
 from bender.entity import entity
 from bender.modulation import Modulation
 from bender.parameter import (
     BoolParameter,
+    ChoiceParameter,
     IntParameter,
     ModulationParameter,
 )
 from bender.processor import OneToOneProcessor
-from bender.sound import Sound
+from bender.sound import SAMPLE_DTYPE, Sound
+
+# Window of the delay line pitch shifter in seconds
+PITCH_WINDOW = 0.05
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _at(values: np.ndarray, i: int) -> float:
+    # Constant values are passed as arrays with a single element
+    return values[i] if len(values) > 1 else values[0]
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _shift_read(
+    buffer: np.ndarray, i: int, phase: float, window: float, table: np.ndarray
+) -> float:
+    """
+    Read a pitch shifted sample from a delay line with two taps half a window apart, whose
+    delays sweep through the window. Each tap fades out before its delay wraps around.
+    """
+    second = phase + 0.5 if phase < 0.5 else phase - 0.5
+    first_gain = np.sin(np.pi * phase) ** 2
+    first = delay_read(buffer, i, phase * window, table)
+    return first_gain * first + (1.0 - first_gain) * delay_read(buffer, i, second * window, table)
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _feedback_delay(
+    left: np.ndarray,
+    right: np.ndarray,
+    delay_left: np.ndarray,
+    delay_right: np.ndarray,
+    feedback: np.ndarray,
+    pingpong: bool,
+    ratio: float,
+    window: float,
+    table: np.ndarray,
+    lines: np.ndarray,
+    pitch_lines: np.ndarray,
+    out_left: np.ndarray,
+    out_right: np.ndarray,
+) -> None:
+    """
+    Stereo delay with a recursive feedback network computed in a single pass:
+
+        out_left = P(D_left(left) + feedback * D(out_left))
+        out_right = P(D_right(right) + feedback * D(out_right))
+
+    where D is the delay of the same channel, or of the other channel for ping-pong, which sends
+    every echo to the opposite side, and P is a delay line pitch shifter, so that every echo is
+    shifted once more than the previous one. Delays are in samples and can be fractional, delays
+    in the feedback path are at least one sample.
+
+    :param left: Left input channel.
+    :param right: Right input channel.
+    :param delay_left: Left delay in samples for every sample, or a single constant delay.
+    :param delay_right: Right delay in samples for every sample, or a single constant delay.
+    :param feedback: Feedback amount for every sample, or a single constant amount.
+    :param pingpong: Enable ping-pong routing.
+    :param ratio: Pitch shift ratio, 1.0 disables pitch shifting.
+    :param window: Window of the pitch shifter in samples.
+    :param table: Interpolation table of the delay lines.
+    :param lines: Delay lines of the left and right input and output, room for the longest delay.
+    :param pitch_lines: Delay lines of the pitch shifter, room for the window.
+    :param out_left: Output buffer of the left channel.
+    :param out_right: Output buffer of the right channel.
+    """
+    # The delay of the pitch shifter taps changes by 1 - ratio samples every sample
+    phase = 0.0
+    step = (1.0 - ratio) / window
+
+    for i in range(len(left)):
+        d_left = _at(delay_left, i)
+        d_right = _at(delay_right, i)
+        fb = _at(feedback, i)
+
+        delay_write(lines[0], i, left[i])
+        delay_write(lines[1], i, right[i])
+
+        # The output is written up to the previous sample, echoes of the other channel are
+        # delayed by the delay of that channel
+        if pingpong:
+            echo_left = delay_read(lines[3], i - 1, max(d_right, 1.0) - 1.0, table)
+            echo_right = delay_read(lines[2], i - 1, max(d_left, 1.0) - 1.0, table)
+        else:
+            echo_left = delay_read(lines[2], i - 1, max(d_left, 1.0) - 1.0, table)
+            echo_right = delay_read(lines[3], i - 1, max(d_right, 1.0) - 1.0, table)
+
+        wet_left = delay_read(lines[0], i, d_left, table) + fb * echo_left
+        wet_right = delay_read(lines[1], i, d_right, table) + fb * echo_right
+
+        if ratio != 1.0:
+            delay_write(pitch_lines[0], i, wet_left)
+            delay_write(pitch_lines[1], i, wet_right)
+            wet_left = _shift_read(pitch_lines[0], i, phase, window, table)
+            wet_right = _shift_read(pitch_lines[1], i, phase, window, table)
+
+            phase += step
+            phase -= np.floor(phase)
+
+        delay_write(lines[2], i, wet_left)
+        delay_write(lines[3], i, wet_right)
+        out_left[i] = wet_left
+        out_right[i] = wet_right
 
 
 @entity(
@@ -42,7 +154,7 @@ from bender.sound import Sound
             min_value=-48,
             max_value=48,
             clamp=True,
-            description="Pitch shift amount",
+            description="Pitch shift of every echo in semitones",
         ),
         "mix": ModulationParameter(
             default=Modulation(0.5),
@@ -50,6 +162,17 @@ from bender.sound import Sound
             max_value=1.0,
             description="Mix amount",
         ),
+        "interpolation": ChoiceParameter(
+            default=DEFAULT_INTERPOLATION,
+            choices=INTERPOLATIONS,
+            description="Interpolation of modulated delay times",
+        ),
+        "control": IntParameter(
+            default=0,
+            min_value=0,
+            max_value=4096,
+            description="Samples between evaluations of modulated parameters, 0 for every sample",
+        ),
     },
 )
 class DelayProcessor(OneToOneProcessor):
@@ -61,87 +184,106 @@ class DelayProcessor(OneToOneProcessor):
         feedback: float | str | Modulation,
         pitch: float,
         mix: float | str | Modulation,
+        interpolation: str = DEFAULT_INTERPOLATION,
+        control: int = 0,
     ) -> None:
-        self.lt = Modulation(lt)
-        self.rt = Modulation(rt)
+        # Modulated parameters are evaluated at the control rate if a period is given
+        control_period = control or None
+
+        self.lt = Modulation(lt, control_period=control_period)
+        self.rt = Modulation(rt, control_period=control_period)
         self.pingpong = pingpong
-        self.feedback = Modulation(feedback)
+        self.feedback = Modulation(feedback, control_period=control_period)
         self.pitch = pitch
-        self.mix = Modulation(mix)
+        self.mix = Modulation(mix, control_period=control_period)
+        self.table = get_table(interpolation)
 
     @staticmethod
-    def _variable_delay(signal: np.ndarray, delay_samples: np.ndarray) -> np.ndarray:
-        x = np.arange(len(signal))
-        sample_points = np.arange(len(signal)) - delay_samples
-
-        # Find valid sample points (not before the start of the signal)
-        valid_mask = sample_points >= 0
-
-        # Use linear interpolation for valid sample points
-        output = np.zeros_like(signal)
-        output[valid_mask] = np.interp(
-            sample_points[valid_mask],  # x-coordinates to interpolate at
-            x,  # x-coordinates of original signal
-            signal,  # y-coordinates of original signal
-        )
+    def _delay_samples(delay_seconds: Modulation, signal: np.ndarray, sr: int) -> np.ndarray:
+        if (constant_delay := delay_seconds.constant) is not None:
+            return np.array([int(constant_delay * sr)], dtype=np.float64)
 
-        return output
+        return delay_seconds.like(signal, sr) * sr
 
-    @staticmethod
-    def _constant_delay(signal: np.ndarray, delay_samples: int) -> np.ndarray:
-        if delay_samples <= 0:
-            return signal
+    def _process_pair(
+        self, left: np.ndarray, right: np.ndarray, sr: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.feedback.constant is not None:
+            # Constant value clamped to the constraints of the modulation
+            feedback = self.feedback.like([0.0])
+        else:
+            feedback = self.feedback.like(left, sr)
 
-        delayed_signal = np.zeros_like(signal)
-        delayed_signal[delay_samples:] = signal[:-delay_samples]
+        delay_left = self._delay_samples(self.lt, left, sr)
+        delay_right = self._delay_samples(self.rt, right, sr)
+        window = PITCH_WINDOW * sr
 
-        return delayed_signal
+        result_left = np.empty(len(left), dtype=SAMPLE_DTYPE)
+        result_right = np.empty(len(right), dtype=SAMPLE_DTYPE)
+        _feedback_delay(
+            left,
+            right,
+            delay_left,
+            delay_right,
+            feedback,
+            self.pingpong,
+            2.0 ** (self.pitch / 12),
+            window,
+            self.table,
+            allocate(max(delay_left.max(), delay_right.max(), 1.0), self.table, 4),
+            allocate(window if self.pitch != 0 else 0.0, self.table, 2),
+            result_left,
+            result_right,
+        )
 
-    def _delay(self, signal: np.ndarray, delay_seconds: Modulation, sr: int) -> np.ndarray:
-        if (constant_delay := delay_seconds.constant) is not None:
-            delayed_signal = self._constant_delay(signal, int(constant_delay * sr))
-        else:
-            delay_samples = delay_seconds.like(signal, sr) * sr
-            delayed_signal = self._variable_delay(signal, delay_samples)
-
-        # Apply pitch shifting if needed
-        if self.pitch != 0:
-            delayed_signal = librosa.effects.pitch_shift(
-                delayed_signal,
-                sr=sr,
-                n_steps=self.pitch,
-                bins_per_octave=12,
-            )
+        out_left = mix(left, result_left, sr, self.mix, out=result_left)
+        out_right = mix(right, result_right, sr, self.mix, out=result_right)
 
-        return delayed_signal
+        return out_left, out_right
 
     def _process(self, sound: Sound) -> Sound:
-        left = sound.left.copy()
-        right = sound.right.copy()
         sr = sound.sample_rate
 
-        delay_left = self._delay(left, self.lt, sr)
-        delay_right = self._delay(right, self.rt, sr)
+        if sound.channels <= 2:
+            return Sound(*self._process_pair(sound.left, sound.right, sr), sr)
 
-        result_left = delay_left
-        result_right = delay_right
-
-        feedback_left = self.feedback.like(delay_left)
-        feedback_right = self.feedback.like(delay_right)
-        feedback_max = max(feedback_left.max(), feedback_right.max())
-
-        # Limit feedback iterations
-        for _ in range(int(3 / (1.0 - feedback_max))):
-            delay_left = self._delay(delay_left, self.lt, sr) * feedback_left
-            delay_right = self._delay(delay_right, self.rt, sr) * feedback_right
+        # Channels are delayed in pairs, left with lt and right with rt. The last channel of an
+        # odd number of channels is paired with itself and keeps the left output.
+        channels = []
+        for first in range(0, sound.channels, 2):
+            second = min(first + 1, sound.channels - 1)
+            out_left, out_right = self._process_pair(
+                sound.channel(first), sound.channel(second), sr
+            )
+            channels.extend([out_left, out_right][: second - first + 1])
 
-            if self.pingpong:
-                delay_left, delay_right = delay_right, delay_left
+        return Sound.from_channels(channels, sr)
 
-            result_left += delay_left
-            result_right += delay_right
 
-        out_left = mix(left, result_left, sr, self.mix)
-        out_right = mix(right, result_right, sr, self.mix)
+def warmup() -> None:
+    """
+    Compile the feedback delay kernel for constant and modulated parameters.
+    """
+    signal = np.zeros((256, 2), dtype=SAMPLE_DTYPE)
+    constant = np.ones(1, dtype=np.float64)
+    modulated = np.ones(256, dtype=SAMPLE_DTYPE)
+    table = get_table(DEFAULT_INTERPOLATION)
 
-        return Sound(out_left, out_right, sr)
+    for delay in (constant, modulated):
+        for feedback in (constant.astype(SAMPLE_DTYPE), modulated):
+            out = np.zeros((2, 256), dtype=SAMPLE_DTYPE)
+            _feedback_delay(
+                signal[:, 0],
+                signal[:, 1],
+                delay,
+                delay,
+                feedback,
+                False,
+                2.0,
+                64.0,
+                table,
+                allocate(1.0, table, 4),
+                allocate(64.0, table, 2),
+                out[0],
+                out[1],
+            )
@@ -1,12 +1,14 @@
-from typing import Callable
-
 import numpy as np
 
+from bender.effects import mix
 from bender.entity import entity
+from bender.lazy import LazySound
 from bender.modulation import Modulation
-from bender.parameter import ChoiceParameter, ModulationParameter
+from bender.oversampling import OVERSAMPLING_FACTORS, Oversampler
+from bender.parameter import ChoiceParameter, IntParameter, ModulationParameter
 from bender.processor import OneToOneProcessor
-from bender.sound import Sound
+from bender.sound import DEFAULT_BLOCK_SIZE, Sound
+from bender.waveshaper import CURVES, get_table, waveshape
 
 
 @entity(
@@ -21,25 +23,79 @@ from bender.sound import Sound
         ),
         "kind": ChoiceParameter(
             default="tanh",
-            choices=["tanh", "hard"],
+            choices=list(CURVES),
             description="Distortion type",
         ),
+        "oversample": ChoiceParameter(
+            default="1",
+            choices=[str(factor) for factor in OVERSAMPLING_FACTORS],
+            description="Oversampling factor, reduces aliasing of high gains",
+        ),
+        "mix": ModulationParameter(
+            default=Modulation(1.0),
+            min_value=0.0,
+            max_value=1.0,
+            description="Mix amount",
+        ),
+        "control": IntParameter(
+            default=0,
+            min_value=0,
+            max_value=4096,
+            description="Samples between evaluations of modulated parameters, 0 for every sample",
+        ),
     },
 )
 class DistortionProcessor(OneToOneProcessor):
-    def __init__(self, gain: float | str | Modulation, kind: str) -> None:
-        self.gain = Modulation(gain)
+    # The curve is applied to every sample on its own, channels only share the gain
+    channel_independent = True
+
+    def __init__(
+        self,
+        gain: float | str | Modulation,
+        kind: str,
+        oversample: int | str = 1,
+        mix: float | str | Modulation = 1.0,
+        control: int = 0,
+    ) -> None:
+        # Modulated parameters are evaluated at the control rate if a period is given
+        control_period = control or None
+
+        self.gain = Modulation(gain, control_period=control_period)
         self.kind = kind
+        self.table = get_table(kind)
+        self.oversample = int(oversample)
+        self.mix = Modulation(mix, control_period=control_period)
+
+    def _gain(self, start: int, size: int, sr: int, length: int) -> float | np.ndarray:
+        if (gain := self.gain.constant) is not None:
+            return gain
+
+        return self.gain.block(start, size, sr, length)
+
+    def _process_oversampled(self, signal: np.ndarray, sample_rate: int) -> np.ndarray:
+        sr = sample_rate * self.oversample
+        length = len(signal) * self.oversample
+
+        def shape(block: np.ndarray, start: int) -> np.ndarray:
+            # The block is a temporary buffer of the oversampler and can be overwritten
+            gain = self._gain(start, len(block), sr, length)
+            return waveshape(block, gain, self.table, out=block)
+
+        oversampler = Oversampler(self.oversample, 1)
+        blocks = (
+            signal[offset : offset + DEFAULT_BLOCK_SIZE, None]
+            for offset in range(0, len(signal), DEFAULT_BLOCK_SIZE)
+        )
+        result = np.concatenate([signal[:0, None], *oversampler.stream(blocks, shape)])[:, 0]
+
+        return mix(signal, result, sample_rate, self.mix, out=result)
+
+    def _process_channel(self, signal: np.ndarray, sample_rate: int) -> np.ndarray:
+        if self.oversample > 1:
+            return self._process_oversampled(signal, sample_rate)
+
+        # Gain, curve and mix are applied in a single pass
+        sound = Sound.from_array(signal[:, None], sample_rate, channels=1)
+        result = LazySound(sound).gain(self.gain).shape(self.table).mix(self.mix).compute()
 
-    def get_distortion(self, kind: str) -> Callable[[np.ndarray], np.ndarray]:
-        if kind == "tanh":
-            return lambda x: np.tanh(x)
-        elif kind == "hard":
-            return lambda x: np.clip(x, -1, 1)
-        else:
-            raise ValueError(f"Unknown distortion kind: {kind}")
-
-    def _process(self, sound: Sound) -> Sound:
-        fn = self.get_distortion(self.kind)
-        gain = self.gain.like(sound)
-        return sound.process(lambda x, _: fn(x * gain))
+        return result.data[:, 0]
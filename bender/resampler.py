@@ -0,0 +1,88 @@
+from fractions import Fraction
+from typing import Iterator
+
+import numpy as np
+import soxr
+from scipy.signal import resample_poly
+
+RESAMPLE_QUALITIES = ["vhq", "hq", "lq", "polyphase"]
+DEFAULT_RESAMPLE_QUALITY = "vhq"
+
+# soxr quality recipes for each quality tier
+_SOXR_QUALITIES: dict[str, str] = {
+    "vhq": "VHQ",
+    "hq": "HQ",
+    "lq": "LQ",
+}
+
+
+def _check_quality(quality: str) -> None:
+    if quality not in RESAMPLE_QUALITIES:
+        raise ValueError(
+            f"Unknown resample quality: {quality}, expected one of {', '.join(RESAMPLE_QUALITIES)}"
+        )
+
+
+def resample(
+    data: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+    quality: str = DEFAULT_RESAMPLE_QUALITY,
+) -> np.ndarray:
+    """
+    Resample all channels of a multichannel signal in a single call. The polyphase quality uses
+    a polyphase FIR filter and is intended for integer or other simple ratios between the rates,
+    other qualities use soxr with the corresponding recipe.
+
+    :param data: signal of shape (frames, channels)
+    :param orig_sr: sample rate of the signal
+    :param target_sr: sample rate to resample to
+    :param quality: one of vhq, hq, lq or polyphase
+    :return: resampled signal of shape (frames, channels) with the same dtype
+    """
+    assert orig_sr > 0 and target_sr > 0, "Sample rates must be positive"
+    _check_quality(quality)
+
+    if quality == "polyphase":
+        ratio = Fraction(target_sr, orig_sr)
+        result = resample_poly(data, ratio.numerator, ratio.denominator, axis=0)
+        return result.astype(data.dtype, copy=False)
+
+    return soxr.resample(data, orig_sr, target_sr, quality=_SOXR_QUALITIES[quality])
+
+
+def resample_blocks(
+    data: np.ndarray,
+    orig_sr: int,
+    target_sr: int,
+    block_size: int,
+    quality: str = DEFAULT_RESAMPLE_QUALITY,
+) -> Iterator[np.ndarray]:
+    """
+    Resample a multichannel signal block by block, so that the resampled signal is never held
+    in memory as a whole. The polyphase quality has no streaming implementation, the signal is
+    resampled at once and returned in blocks.
+
+    :param data: signal of shape (frames, channels)
+    :param orig_sr: sample rate of the signal
+    :param target_sr: sample rate to resample to
+    :param block_size: number of input frames to resample at once
+    :param quality: one of vhq, hq, lq or polyphase
+    :return: iterator of resampled blocks of shape (frames, channels)
+    """
+    assert block_size > 0, "Block size must be positive"
+    _check_quality(quality)
+
+    if quality == "polyphase":
+        result = resample(data, orig_sr, target_sr, quality)
+        for offset in range(0, len(result), block_size):
+            yield result[offset : offset + block_size]
+        return
+
+    stream = soxr.ResampleStream(
+        orig_sr, target_sr, data.shape[1], dtype=data.dtype, quality=_SOXR_QUALITIES[quality]
+    )
+
+    for offset in range(0, len(data), block_size):
+        block = np.ascontiguousarray(data[offset : offset + block_size])
+        yield stream.resample_chunk(block, last=offset + block_size >= len(data))
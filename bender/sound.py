@@ -1,36 +1,215 @@
 import functools
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
-import librosa
 import numpy as np
 import soundfile
 
+from bender.resampler import DEFAULT_RESAMPLE_QUALITY, resample, resample_blocks
 
-@dataclass(frozen=True)
+DEFAULT_BLOCK_SIZE = 65536
+
+# dtype of all sample buffers, every converter, effect and processor is expected to keep it
+SAMPLE_DTYPE = np.dtype(np.float32)
+
+# numpy dtypes of sample data stored verbatim in WAV files, by soundfile subtype
+_WAV_DTYPES: dict[str, np.dtype] = {
+    "PCM_U8": np.dtype(np.uint8),
+    "PCM_16": np.dtype("<i2"),
+    "PCM_32": np.dtype("<i4"),
+    "FLOAT": np.dtype("<f4"),
+    "DOUBLE": np.dtype("<f8"),
+}
+
+
+@functools.cache
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool shared by parallel channel processing.
+
+    :return: thread pool with one worker per CPU
+    """
+    return ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bender")
+
+
+def _is_same_channel(a: np.ndarray, b: np.ndarray) -> bool:
+    return (
+        a is b or a.ctypes.data == b.ctypes.data and a.strides == b.strides and a.dtype == b.dtype
+    )
+
+
+def _interleave(channels: list[np.ndarray]) -> np.ndarray:
+    """
+    Build a contiguous array of SAMPLE_DTYPE from separate channels. If the channels are already
+    the columns of such an array, return a view of it instead of copying. If all channels are the
+    same array, it is stored only once.
+
+    :param channels: list of 1D channels of the same length
+    :return: array of shape (n, channels) with interleaved samples, or (n, 1) for identical
+        channels
+    """
+    first = channels[0]
+
+    if all(_is_same_channel(first, channel) for channel in channels[1:]):
+        return first.astype(SAMPLE_DTYPE, copy=False)[:, None]
+
+    n_channels = len(channels)
+    itemsize = SAMPLE_DTYPE.itemsize
+
+    if all(
+        channel.dtype == SAMPLE_DTYPE
+        and channel.strides == (n_channels * itemsize,)
+        and channel.ctypes.data == first.ctypes.data + i * itemsize
+        for i, channel in enumerate(channels)
+    ):
+        return np.lib.stride_tricks.as_strided(
+            first,
+            shape=(len(first), n_channels),
+            strides=(n_channels * itemsize, itemsize),
+            writeable=first.flags.writeable,
+        )
+
+    data = np.empty((len(first), n_channels), dtype=SAMPLE_DTYPE)
+    for i, channel in enumerate(channels):
+        data[:, i] = channel
+
+    return data
+
+
+def _expand_mono(blocks: Iterator[np.ndarray], channels: int) -> Iterator[np.ndarray]:
+    for block in blocks:
+        yield np.repeat(block, channels, axis=1)
+
+
+@dataclass(frozen=True, init=False, eq=False)
 class Sound:
-    left: np.ndarray
-    right: np.ndarray
+    data: np.ndarray
     sample_rate: int
     filename: str | None = None
+    channels: int = 2
 
-    def __post_init__(self):
-        if self.left.ndim != 1:
+    def __init__(
+        self, left: np.ndarray, right: np.ndarray, sample_rate: int, filename: str | None = None
+    ) -> None:
+        if left.ndim != 1:
             raise ValueError("Left channel must be 1D")
-        if self.right.ndim != 1:
+        if right.ndim != 1:
             raise ValueError("Right channel must be 1D")
-        if len(self.left) != len(self.right):
+        if len(left) != len(right):
             raise ValueError("Left and right channels must have the same length")
-        if self.sample_rate <= 0:
+
+        self._init(_interleave([left, right]), sample_rate, filename, 2)
+
+    @classmethod
+    def from_channels(
+        cls, channels: list[np.ndarray], sample_rate: int, filename: str | None = None
+    ) -> "Sound":
+        """
+        Create a Sound object with any number of channels.
+
+        :param channels: list of 1D channels of the same length
+        :param sample_rate: sample rate of the sound
+        :param filename: optional filename of the sound
+        :return: new Sound object with the given channels
+        """
+        if not channels:
+            raise ValueError("At least one channel is required")
+        if any(channel.ndim != 1 for channel in channels):
+            raise ValueError("Channels must be 1D")
+        if any(len(channel) != len(channels[0]) for channel in channels):
+            raise ValueError("Channels must have the same length")
+
+        return cls.from_array(_interleave(channels), sample_rate, filename, len(channels))
+
+    @classmethod
+    def from_array(
+        cls,
+        data: np.ndarray,
+        sample_rate: int,
+        filename: str | None = None,
+        channels: int | None = None,
+    ) -> "Sound":
+        """
+        Create a Sound object from interleaved samples without copying them, unless they have to be
+        converted to SAMPLE_DTYPE.
+
+        :param data: array of shape (n, channels), or of shape (n, 1) for a sound with identical
+            channels
+        :param sample_rate: sample rate of the sound
+        :param filename: optional filename of the sound
+        :param channels: number of channels, only needed if data holds a single channel shared by
+            all channels, defaults to 2 in that case
+        :return: new Sound object backed by the given array
+        """
+        if data.ndim != 2:
+            raise ValueError(f"Sound data must have shape (n, channels), got {data.shape}")
+
+        if channels is None:
+            channels = 2 if data.shape[1] == 1 else data.shape[1]
+
+        sound = cls.__new__(cls)
+        sound._init(data, sample_rate, filename, channels)
+        return sound
+
+    def _init(
+        self, data: np.ndarray, sample_rate: int, filename: str | None, channels: int
+    ) -> None:
+        if data.ndim != 2 or data.shape[1] not in (1, channels):
+            raise ValueError(
+                f"Sound data must have shape (n, {channels}) or (n, 1), got {data.shape}"
+            )
+        if channels <= 0:
+            raise ValueError("Number of channels must be positive")
+        if sample_rate <= 0:
             raise ValueError("Sample rate must be positive")
 
-    def resample(self, sample_rate: int) -> "Sound":
+        object.__setattr__(self, "data", data.astype(SAMPLE_DTYPE, copy=False))
+        object.__setattr__(self, "sample_rate", sample_rate)
+        object.__setattr__(self, "filename", filename)
+        object.__setattr__(self, "channels", channels)
+
+    def channel(self, index: int) -> np.ndarray:
+        """
+        Get a view of a single channel.
+
+        :param index: index of the channel
+        :return: 1D view of the channel samples
+        """
+        if not 0 <= index < self.channels:
+            raise IndexError(f"Channel index {index} out of range for {self.channels} channels")
+
+        return self.data[:, 0] if self.is_mono else self.data[:, index]
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.channel(0)
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.channel(min(1, self.channels - 1))
+
+    @property
+    def is_mono(self) -> bool:
+        """
+        Check if all channels share the same samples. Such sounds store, resample and process
+        a single channel until an operation makes the channels differ.
+
+        :return: True if all channels are identical
         """
-        Resample both channels to the given sample rate and return a new Sound object. If the sample rate
-        is the same as the current sample rate, return the original Sound object.
+        return self.data.shape[1] == 1
+
+    def resample(self, sample_rate: int, quality: str = DEFAULT_RESAMPLE_QUALITY) -> "Sound":
+        """
+        Resample all channels to the given sample rate and return a new Sound object. If the
+        sample rate is the same as the current sample rate, return the original Sound object.
 
         :param sample_rate: new sample rate
+        :param quality: resampling quality, one of vhq, hq, lq or polyphase
         :return: new Sound object with the resampled channels
         """
         assert sample_rate > 0, "Sample rate must be positive"
@@ -38,30 +217,34 @@ class Sound:
         if sample_rate == self.sample_rate:
             return self
 
-        resample = functools.partial(
-            librosa.resample,
-            orig_sr=self.sample_rate,
-            target_sr=sample_rate,
-            fix=False,
-            scale=False,
-            res_type="soxr_vhq",
-        )
+        data = resample(self.data, self.sample_rate, sample_rate, quality)
 
-        return Sound(resample(self.left), resample(self.right), sample_rate, self.filename)
+        return Sound.from_array(data, sample_rate, self.filename, self.channels)
 
-    def process(self, fn: Callable[[np.ndarray, int], np.ndarray]) -> "Sound":
+    def process(
+        self, fn: Callable[[np.ndarray, int], np.ndarray], parallel: bool = False
+    ) -> "Sound":
         """
         Apply a function to each channel separately and return a new Sound object.
 
-        :param fn: function to apply to both channels that takes a numpy array and sample rate as arguments
+        :param fn: function to apply to every channel that takes a numpy array and sample rate as
+            arguments
+        :param parallel: process the channels concurrently in a thread pool, only useful if fn
+            releases the GIL, e.g. numba kernels compiled with nogil or large numpy operations
         :return: new Sound object with the processed channels
         """
-        return Sound(
-            fn(self.left, self.sample_rate),
-            fn(self.right, self.sample_rate),
-            self.sample_rate,
-            self.filename,
-        )
+        columns = [self.data[:, i] for i in range(self.data.shape[1])]
+        sample_rates = [self.sample_rate] * len(columns)
+
+        if parallel and len(columns) > 1:
+            results = list(get_executor().map(fn, columns, sample_rates))
+        else:
+            results = list(map(fn, columns, sample_rates))
+
+        if self.is_mono:
+            results = results * self.channels
+
+        return Sound.from_channels(results, self.sample_rate, self.filename)
 
     def with_filename(self, filename: str) -> "Sound":
         """
@@ -70,7 +253,7 @@ class Sound:
         :param filename: new filename
         :return: new Sound object with the updated filename
         """
-        return Sound(self.left, self.right, self.sample_rate, filename)
+        return Sound.from_array(self.data, self.sample_rate, filename, self.channels)
 
     def save(self, path: str | Path, bit_depth: int = 16) -> None:
         """
@@ -79,43 +262,75 @@ class Sound:
         :param path: path to the file
         :param bit_depth: bit depth of the sound file, must be one of 8, 16, 24 or 32
         """
-        match bit_depth:
-            case 8:
-                subtype = "PCM_S8"
-            case 16:
-                subtype = "PCM_16"
-            case 24:
-                subtype = "PCM_24"
-            case 32:
-                subtype = "PCM_32"
-            case _:
-                raise ValueError(f"Unsupported bit depth: {bit_depth}, expected 8, 16, 24 or 32")
-
-        soundfile.write(
-            path,
-            np.vstack([self.left, self.right]).T,
-            self.sample_rate,
-            subtype=subtype,
+        with SoundWriter(path, self.sample_rate, self.channels, bit_depth=bit_depth) as writer:
+            for block in self.blocks():
+                writer.write(block)
+
+    def blocks(
+        self, block_size: int = DEFAULT_BLOCK_SIZE, expand: bool = True
+    ) -> Iterator[np.ndarray]:
+        """
+        Iterate over the interleaved samples in blocks without copying them. Blocks of sounds
+        with identical channels are expanded to all channels block by block.
+
+        :param block_size: number of frames in each block
+        :param expand: expand blocks of sounds with identical channels, otherwise they have a
+            single channel, e.g. to process it once before writing
+        :return: iterator of blocks of shape (frames, channels)
+        """
+        assert block_size > 0, "Block size must be positive"
+
+        blocks = (
+            self.data[offset : offset + block_size] for offset in range(0, len(self), block_size)
         )
 
+        return _expand_mono(blocks, self.channels) if self.is_mono and expand else blocks
+
+    def resampled_blocks(
+        self,
+        sample_rate: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        quality: str = DEFAULT_RESAMPLE_QUALITY,
+    ) -> Iterator[np.ndarray]:
+        """
+        Resample the sound block by block, so that the resampled sound is never held in memory
+        as a whole. If the sample rate is the same as the current sample rate, the blocks are
+        views of the original samples.
+
+        :param sample_rate: new sample rate
+        :param block_size: number of input frames to resample at once
+        :param quality: resampling quality, one of vhq, hq, lq or polyphase
+        :return: iterator of resampled blocks of shape (frames, channels)
+        """
+        assert sample_rate > 0, "Sample rate must be positive"
+
+        if sample_rate == self.sample_rate:
+            return self.blocks(block_size)
+
+        blocks = resample_blocks(self.data, self.sample_rate, sample_rate, block_size, quality)
+
+        return _expand_mono(blocks, self.channels) if self.is_mono else blocks
+
     @staticmethod
-    def load(path: str | Path, sample_rate: int | None = None) -> "Sound":
+    def load(path: str | Path, sample_rate: int | None = None, mmap: bool = False) -> "Sound":
         """
         Load a sound from a file.
 
         :param path: path to the sound file
         :param sample_rate: sample rate to resample the sound to, if None, use the original sample rate
+        :param mmap: map the sample data from disk instead of decoding it, see SoundReader
         :return: Sound object with the loaded sound
         """
         assert sample_rate is None or sample_rate >= 0, "Sample rate must be positive"
 
-        buffer, sr = librosa.load(path, sr=sample_rate, mono=False, dtype=np.float32)
-        if buffer.ndim == 1:
-            left, right = buffer, buffer
-        else:
-            left, right = buffer[0], buffer[1]
+        if mmap:
+            sound = SoundReader(path).sound()
+            return sound if sample_rate is None else sound.resample(sample_rate)
 
-        return Sound(left, right, int(sr), str(path))
+        buffer, sr = soundfile.read(path, dtype=SAMPLE_DTYPE.name, always_2d=True)
+        sound = Sound.from_array(buffer, int(sr), str(path))
+
+        return sound if sample_rate is None else sound.resample(sample_rate)
 
     def __len__(self) -> int:
         """
@@ -123,7 +338,7 @@ class Sound:
 
         :return: length of the sound in samples
         """
-        return max(len(self.left), len(self.right))
+        return len(self.data)
 
     @property
     def duration(self) -> float:
@@ -133,3 +348,182 @@ class Sound:
         :return: duration of the sound in seconds
         """
         return len(self) / self.sample_rate
+
+
+def _find_wav_data(path: str | Path) -> int | None:
+    """
+    Find the offset of the sample data in a RIFF WAVE file.
+
+    :param path: path to the sound file
+    :return: offset of the data chunk payload in bytes, None if the file is not a RIFF WAVE file
+    """
+    with open(path, "rb") as fd:
+        riff = fd.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+            return None
+
+        while len(chunk := fd.read(8)) == 8:
+            chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"data":
+                return fd.tell()
+
+            # chunks are word aligned
+            fd.seek(chunk_size + (chunk_size & 1), 1)
+
+    return None
+
+
+class SoundReader:
+    """
+    Lazy reader for sound files that are too large to be decoded into memory at once.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+        info = soundfile.info(str(self.path))
+        self.sample_rate = int(info.samplerate)
+        self.channels = int(info.channels)
+        self.frames = int(info.frames)
+        self.format = info.format
+        self.subtype = info.subtype
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def blocks(
+        self, block_size: int = DEFAULT_BLOCK_SIZE, start: int = 0, stop: int | None = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Decode the sound file block by block.
+
+        :param block_size: number of frames in each block
+        :param start: first frame to read
+        :param stop: frame to stop reading at, if None, read until the end of the file
+        :return: iterator of SAMPLE_DTYPE arrays of shape (frames, channels)
+        """
+        assert block_size > 0, "Block size must be positive"
+
+        stop = self.frames if stop is None else min(stop, self.frames)
+
+        with soundfile.SoundFile(str(self.path)) as fd:
+            fd.seek(start)
+            for offset in range(start, stop, block_size):
+                yield fd.read(
+                    min(block_size, stop - offset), dtype=SAMPLE_DTYPE.name, always_2d=True
+                )
+
+    def view(self) -> np.ndarray:
+        """
+        Map the raw sample data of the file into memory without decoding it. Only WAV files with
+        8, 16 or 32 bit integer and 32 or 64 bit float samples can be mapped.
+
+        :return: read-only array of shape (frames, channels) in the native dtype of the file
+        """
+        dtype = _WAV_DTYPES.get(self.subtype) if self.format == "WAV" else None
+        offset = _find_wav_data(self.path)
+        if dtype is None or offset is None:
+            raise ValueError(f"Unsupported format for mapping: {self.format} {self.subtype}")
+
+        return np.memmap(
+            self.path, dtype=dtype, mode="r", offset=offset, shape=(self.frames, self.channels)
+        )
+
+    def sound(self, block_size: int = DEFAULT_BLOCK_SIZE) -> Sound:
+        """
+        Load the file as a Sound backed by memory-mapped data. Files with 32 bit float samples
+        are mapped directly, any other format is decoded block by block into a temporary file.
+
+        :param block_size: number of frames to decode at once
+        :return: Sound object with channels backed by a memory map
+        """
+        if self.frames == 0:
+            data = np.zeros((0, self.channels), dtype=SAMPLE_DTYPE)
+        elif self.format == "WAV" and self.subtype == "FLOAT":
+            data = self.view()
+        else:
+            with tempfile.TemporaryFile() as fd:
+                data = np.memmap(
+                    fd, dtype=SAMPLE_DTYPE, mode="w+", shape=(self.frames, self.channels)
+                )
+
+            offset = 0
+            for block in self.blocks(block_size):
+                data[offset : offset + len(block)] = block
+                offset += len(block)
+
+            data.flags.writeable = False
+
+        return Sound.from_array(data, self.sample_rate, str(self.path))
+
+
+def _get_subtype(bit_depth: int) -> str:
+    match bit_depth:
+        case 8:
+            return "PCM_S8"
+        case 16:
+            return "PCM_16"
+        case 24:
+            return "PCM_24"
+        case 32:
+            return "PCM_32"
+        case _:
+            raise ValueError(f"Unsupported bit depth: {bit_depth}, expected 8, 16, 24 or 32")
+
+
+class SoundWriter:
+    """
+    Streaming writer that flushes samples to a sound file block by block as they are produced.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        sample_rate: int,
+        channels: int = 2,
+        bit_depth: int = 16,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ) -> None:
+        assert sample_rate > 0, "Sample rate must be positive"
+        assert block_size > 0, "Block size must be positive"
+
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.frames = 0
+
+        self._fd = soundfile.SoundFile(
+            str(self.path),
+            mode="w",
+            samplerate=sample_rate,
+            channels=channels,
+            subtype=_get_subtype(bit_depth),
+        )
+
+    def __enter__(self) -> "SoundWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def write(self, data: np.ndarray) -> None:
+        """
+        Write samples to the file in blocks of at most block_size frames.
+
+        :param data: array of shape (frames, channels), or of shape (frames, 1) for identical
+            channels, which are expanded block by block
+        """
+        if data.ndim != 2 or data.shape[1] not in (1, self.channels):
+            raise ValueError(f"Expected data of shape (n, {self.channels}), got {data.shape}")
+
+        for offset in range(0, len(data), self.block_size):
+            block = data[offset : offset + self.block_size]
+            if block.shape[1] != self.channels:
+                block = np.repeat(block, self.channels, axis=1)
+            self._fd.write(block)
+
+        self.frames += len(data)
+
+    def close(self) -> None:
+        self._fd.close()
@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import Callable
+
+import numba
+import numpy as np
+
+from bender.sound import SAMPLE_DTYPE
+
+# Transfer curves of the built-in distortion kinds
+CURVES: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "tanh": np.tanh,
+    "hard": lambda x: np.clip(x, -1.0, 1.0),
+    "cubic": lambda x: np.where(np.abs(x) < 1.0, 1.5 * (x - x**3 / 3), np.sign(x)),
+    "fold": lambda x: np.sin(0.5 * np.pi * x),
+}
+
+# Transfer curves are tabulated for inputs between -TABLE_RANGE and TABLE_RANGE, inputs outside
+# of the range get the value at the end of the table
+TABLE_RANGE = 16.0
+
+# Number of table points per unit of the input
+TABLE_RESOLUTION = 256
+
+
+def make_table(curve: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Tabulate a transfer curve for waveshape, values between the points are interpolated
+    linearly. Points are at multiples of 1 / TABLE_RESOLUTION, so curves with corners at such
+    points, e.g. a hard clip at 1.0, are represented exactly.
+
+    :param curve: Vectorized transfer curve.
+    :return: Read-only array of curve values.
+    """
+    x = np.linspace(-TABLE_RANGE, TABLE_RANGE, int(2 * TABLE_RANGE * TABLE_RESOLUTION) + 1)
+    table = np.asarray(curve(x), dtype=np.float64)
+    if table.shape != x.shape or not np.all(np.isfinite(table)):
+        raise ValueError("Transfer curve must return a finite value for every input")
+
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(len(CURVES))
+def get_table(kind: str) -> np.ndarray:
+    """
+    Get the table of a built-in transfer curve.
+
+    :param kind: One of the CURVES.
+    :return: Read-only array of curve values.
+    """
+    if kind not in CURVES:
+        raise ValueError(f"Unknown transfer curve: {kind}, expected one of {', '.join(CURVES)}")
+
+    return make_table(CURVES[kind])
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def table_lookup(table: np.ndarray, x: float) -> float:
+    """
+    Look up a transfer curve at a single input value.
+
+    :param table: Transfer curve from make_table or get_table.
+    :param x: Input value.
+    :return: Curve value, interpolated between the table points.
+    """
+    last = len(table) - 1
+    position = (x + TABLE_RANGE) * (last / (2.0 * TABLE_RANGE))
+
+    if position <= 0.0:
+        return table[0]
+    if position >= last:
+        return table[last]
+
+    k = int(position)
+    return table[k] + (position - k) * (table[k + 1] - table[k])
+
+
+@numba.jit(nopython=True, nogil=True, cache=True)
+def _waveshape(data: np.ndarray, gain: np.ndarray, table: np.ndarray, out: np.ndarray) -> None:
+    for i in range(data.shape[0]):
+        g = gain[i] if len(gain) > 1 else gain[0]
+        for c in range(data.shape[1]):
+            out[i, c] = table_lookup(table, data[i, c] * g)
+
+
+def waveshape(
+    data: np.ndarray,
+    gain: float | np.ndarray,
+    table: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Apply a gain and a tabulated transfer curve to all channels in a single pass.
+
+    :param data: Input audio signal of shape (n, channels).
+    :param gain: Gain for every frame, or a constant gain.
+    :param table: Transfer curve from make_table or get_table.
+    :param out: Optional output buffer of the same shape, can be the input itself.
+    :return: Processed audio signal.
+    """
+    if data.ndim != 2:
+        raise ValueError(f"Expected data of shape (n, channels), got {data.shape}")
+
+    gain = np.atleast_1d(np.asarray(gain))
+    if len(gain) not in (1, len(data)):
+        raise ValueError("gain must be a constant or have a value for every frame")
+
+    if out is None:
+        out = np.empty(data.shape, dtype=SAMPLE_DTYPE)
+    elif out.shape != data.shape:
+        raise ValueError(f"Output buffer must be of shape {data.shape}")
+
+    _waveshape(data, gain, table, out)
+
+    return out
+
+
+def warmup() -> None:
+    """
+    Compile the waveshaping kernel for constant and modulated gains.
+    """
+    data = np.zeros((256, 2), dtype=SAMPLE_DTYPE)
+    table = get_table("tanh")
+
+    waveshape(data, 2.0, table)
+    waveshape(data, np.ones(len(data), dtype=SAMPLE_DTYPE), table)
+
+    # Oversampled blocks
+    oversampled = data.astype(np.float64)
+    waveshape(oversampled, 2.0, table, out=oversampled)
+    waveshape(oversampled, np.ones(len(data), dtype=SAMPLE_DTYPE), table, out=oversampled)
@@ -1,8 +1,15 @@
+import io
+
 import numpy as np
+import pytest
 from PIL import Image
 
-from bender.converter import Converter
+from bender.converter import ConvertedImage, Converter
+from bender.converters.array import ArrayConverter
+from bender.converters.bmp import BMPConverter
+from bender.converters.qam import QAMConverter
 from bender.entity import get_entities
+from bender.sound import Sound
 
 
 def test_image_conversion():
@@ -28,3 +35,111 @@ def test_image_conversion():
         assert mean_difference <= 5, (
             f"Mean difference {mean_difference} exceeds threshold for {converter.__class__.__name__}"
         )
+
+
+def test_encode_keeps_dtype():
+    image = Image.new("RGB", (100, 100), (10, 100, 200))
+
+    for converter in (ArrayConverter(), BMPConverter(), QAMConverter()):
+        converted = converter.encode(image)
+
+        assert converted.sound.data.dtype == np.float32, converter.__class__.__name__
+
+
+def test_encode_mono():
+    image = Image.new("RGB", (100, 100), (10, 100, 200))
+
+    for converter in (ArrayConverter(), BMPConverter()):
+        converted = converter.encode(image)
+
+        assert converted.sound.is_mono, converter.__class__.__name__
+
+
+def test_qam_channels():
+    image = Image.new("RGB", (100, 100), (10, 100, 200))
+
+    stereo = QAMConverter().encode(image)
+    converter = QAMConverter(channels=4)
+    converted = converter.encode(image)
+
+    assert converted.sound.channels == 4
+    assert len(converted.sound) == len(stereo.sound) // 2
+
+    result = np.array(converter.decode(converted), dtype=np.float32)
+    assert np.abs(result - np.array(image, dtype=np.float32)).mean() <= 5
+
+    with pytest.raises(ValueError):
+        QAMConverter(channels=4).decode(stereo)
+
+    with pytest.raises(ValueError):
+        QAMConverter(channels=3)
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_bmp_matches_pil(mode):
+    pixels = np.random.default_rng(0).integers(0, 256, (37, 101, len(mode)), dtype=np.uint8)
+    image = Image.fromarray(pixels, mode)
+
+    with io.BytesIO() as fd:
+        image.save(fd, format="BMP")
+        expected = np.frombuffer(fd.getvalue(), dtype=np.uint8)
+
+    converter = BMPConverter()
+    converted = converter.encode(image)
+
+    # Samples are the raw BMP bytes after the header
+    samples = (converted.sound.left + 1.0) / 2.0 * 255
+    assert np.array_equal(np.rint(samples).astype(np.uint8), expected[54:])
+
+    # Truncated pixel data is read the same way as by PIL, incomplete rows are black
+    truncated = Sound.from_array(converted.sound.data[:-500], 48000)
+    result = converter.decode(ConvertedImage(sound=truncated, metadata=converted.metadata))
+
+    with io.BytesIO(expected[:-500].tobytes()) as fd:
+        with Image.open(fd, formats=["BMP"]) as reference:
+            assert np.array_equal(np.asarray(result), np.asarray(reference))
+
+
+def test_bmp_round_trip_is_exact():
+    pixels = np.random.default_rng(0).integers(0, 256, (37, 101, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels, "RGB")
+
+    converter = BMPConverter(sample_size=1)
+    result = converter.decode(converter.encode(image))
+
+    assert np.array_equal(np.asarray(result), pixels)
+
+
+def test_bmp_without_pixel_limit(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", None)
+    pixels = np.random.default_rng(0).integers(0, 256, (37, 101, 3), dtype=np.uint8)
+
+    converter = BMPConverter(sample_size=1)
+    result = converter.decode(converter.encode(Image.fromarray(pixels, "RGB")))
+
+    assert np.array_equal(np.asarray(result), pixels)
+
+
+@pytest.mark.parametrize("sample_size", [2, 3, 4])
+def test_bmp_wide_samples_round_trip(sample_size):
+    converter = BMPConverter(sample_size=sample_size)
+
+    # The lowest and highest samples are exact
+    for color in ("white", "black"):
+        image = Image.new("RGB", (40, 30), color)
+        result = converter.decode(converter.encode(image))
+        assert np.array_equal(np.asarray(result), np.asarray(image))
+
+    pixels = np.random.default_rng(0).integers(0, 256, (40, 100, 3), dtype=np.uint8)
+    converted = converter.encode(Image.fromarray(pixels, "RGB"))
+    result = converter.decode(converted)
+
+    # Samples are stored in float32, the pixels are exact only for 16-bit samples
+    if sample_size == 2:
+        assert np.array_equal(np.asarray(result), pixels)
+    assert np.array_equal(converter.encode(result).sound.data, converted.sound.data)
+
+    # Samples out of range are clipped
+    loud = Sound.from_array(np.full((len(converted.sound), 1), 1.5), 48000)
+    result = converter.decode(ConvertedImage(sound=loud, metadata=converted.metadata))
+    assert np.all(np.asarray(result) == 255)
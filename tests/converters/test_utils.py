@@ -1,8 +1,12 @@
 import numpy as np
 
 from bender.converters.utils import (
+    am_decode,
+    am_encode,
     lowpass,
     pad_reshape,
+    qam_decode,
+    qam_encode,
     rgb_to_ycbcr,
     ycbcr_to_rgb,
 )
@@ -32,3 +36,17 @@ def test_rgb_to_ycbcr_and_back():
     assert np.allclose(r, r_new, atol=0.01)
     assert np.allclose(g, g_new, atol=0.01)
     assert np.allclose(b, b_new, atol=0.01)
+
+
+def test_modulation_keeps_dtype():
+    m1 = np.random.uniform(0.0, 1.0, size=1000).astype(np.float32)
+    m2 = np.random.uniform(-0.5, 0.5, size=1000).astype(np.float32)
+
+    qam = qam_encode(m1, m2, 1300, 7800)
+    am = am_encode(m1, 1300, 7800)
+    assert qam.dtype == np.float32
+    assert am.dtype == np.float32
+
+    assert all(m.dtype == np.float32 for m in qam_decode(qam, 1300, 7800))
+    assert am_decode(am, 1300, 7800).dtype == np.float32
+    assert all(c.dtype == np.float32 for c in rgb_to_ycbcr(m1, m1, m1))
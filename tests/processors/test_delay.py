@@ -231,3 +231,102 @@ def test_delay_modulation():
 
     assert np.allclose(processed_const.left, processed_mod.left)
     assert np.allclose(processed_const.right, processed_mod.right)
+
+
+def test_delay_modulated_time():
+    sample_rate = 8000
+    t = np.arange(sample_rate) / sample_rate
+    left = np.sin(2 * np.pi * 220 * t)
+    right = np.cos(2 * np.pi * 330 * t)
+
+    processor = DelayProcessor(
+        lt="0.1 + 0.05 * t",
+        rt="0.2 - 0.05 * t",
+        pingpong=False,
+        feedback=0.0,
+        pitch=0,
+        mix=1.0,
+        interpolation="linear",
+    )
+
+    processed = processor._process(Sound(left, right, sample_rate))
+
+    # Without feedback the result is the input read at fractional delays
+    for signal, delay, result in (
+        (left, processor.lt, processed.left),
+        (right, processor.rt, processed.right),
+    ):
+        positions = np.arange(len(signal)) - delay.like(signal, sample_rate) * sample_rate
+        # The signal is silent before the start
+        expected = np.interp(positions, np.arange(-1, len(signal)), np.r_[0.0, signal], left=0.0)
+        assert np.allclose(result, expected, atol=1e-4)
+
+
+def test_delay_feedback_is_not_truncated():
+    sample_rate = 1000
+    left = np.zeros(sample_rate * 10)
+    left[0] = 1.0
+
+    processor = DelayProcessor(
+        lt=0.1,
+        rt=0.1,
+        pingpong=True,
+        feedback=0.95,
+        pitch=0,
+        mix=1.0,
+    )
+
+    processed = processor._process(Sound(left, np.zeros_like(left), sample_rate))
+
+    # Ping-pong sends every echo to the other side, all 99 echoes are present
+    for n in range(1, 100):
+        channel = processed.left if n % 2 == 1 else processed.right
+        assert np.isclose(channel[n * 100], 0.95 ** (n - 1), rtol=1e-4)
+
+    assert np.isclose(
+        np.sum(processed.left) + np.sum(processed.right), np.sum(0.95 ** np.arange(99)), rtol=1e-4
+    )
+
+
+def test_delay_pitch_shift_every_echo():
+    sample_rate = 44100
+    t = np.arange(sample_rate * 2) / sample_rate
+    signal = np.sin(2 * np.pi * 440 * t) * (t < 0.2)
+
+    processor = DelayProcessor(
+        lt=0.5,
+        rt=0.5,
+        pingpong=False,
+        feedback=0.5,
+        pitch=12,
+        mix=1.0,
+    )
+
+    processed = processor._process(Sound(signal, signal, sample_rate))
+
+    def peak_frequency(start: float) -> float:
+        segment = processed.left[int(start * sample_rate) : int((start + 0.1) * sample_rate)]
+        spectrum = np.abs(np.fft.rfft(segment))
+        return np.fft.rfftfreq(len(segment), 1 / sample_rate)[spectrum.argmax()]
+
+    # Every echo is an octave above the previous one
+    assert abs(peak_frequency(0.55) - 880) < 20
+    assert abs(peak_frequency(1.05) - 1760) < 20
+
+
+def test_delay_processes_channels_in_pairs():
+    rng = np.random.default_rng(0)
+    channels = [rng.uniform(-1, 1, 4410) for _ in range(5)]
+    sound = Sound.from_channels(channels, 44100)
+
+    processor = DelayProcessor(lt=0.01, rt=0.02, pingpong=True, feedback=0.5, pitch=0, mix=0.5)
+    processed = processor._process(sound)
+
+    assert processed.channels == 5
+    for first in (0, 2):
+        pair = processor._process(Sound(channels[first], channels[first + 1], 44100))
+        assert np.array_equal(processed.channel(first), pair.left)
+        assert np.array_equal(processed.channel(first + 1), pair.right)
+
+    last = processor._process(Sound(channels[4], channels[4], 44100))
+    assert np.array_equal(processed.channel(4), last.left)
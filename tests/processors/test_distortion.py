@@ -48,3 +48,92 @@ def test_process_method():
     processed_sound = processor.process([sound])
 
     assert isinstance(processed_sound, Sound)
+
+
+def test_process_oversampled():
+    sample_rate = 44100
+    t = np.arange(sample_rate) / sample_rate
+    left = 0.5 * np.sin(2 * np.pi * 100 * t)
+    right = 0.5 * np.sin(2 * np.pi * 200 * t)
+    sound = Sound(left, right, sample_rate)
+
+    for kind, curve in (("tanh", np.tanh), ("hard", lambda x: np.clip(x, -1, 1))):
+        processor = DistortionProcessor(gain=1.5, kind=kind, oversample="4")
+        processed = processor._process(sound)
+
+        # Low frequencies are not affected by the filters
+        assert len(processed) == len(sound)
+        assert np.allclose(processed.left, curve(left * 1.5), atol=1e-2)
+        assert np.allclose(processed.right, curve(right * 1.5), atol=1e-2)
+
+
+def test_process_modulated_gain():
+    left = np.linspace(-1, 1, 1000)
+    right = -left
+    sound = Sound(left, right, 1000)
+
+    processor = DistortionProcessor(gain="1 + t", kind="cubic")
+    processed = processor._process(sound)
+
+    gain = 1 + np.linspace(0, 1, 1000)
+    x = np.clip(left * gain, -1, 1)
+    assert np.allclose(processed.left, 1.5 * (x - x**3 / 3), atol=1e-4)
+    assert np.allclose(processed.right, -processed.left)
+
+
+def test_process_channels_independently():
+    rng = np.random.default_rng(0)
+    channels = [rng.uniform(-1, 1, 5000) for _ in range(4)]
+    sound = Sound.from_channels(channels, 44100)
+
+    for oversample in ("1", "2"):
+        processor = DistortionProcessor(gain="2 + t", kind="tanh", oversample=oversample)
+        processed = processor.process([sound])
+
+        assert processed.channels == 4
+        for i, channel in enumerate(channels):
+            single = processor.process([Sound(channel, channel, 44100)])
+            assert np.array_equal(processed.data[:, i], single.left)
+
+
+def test_process_identical_channels_once():
+    signal = np.linspace(-1, 1, 1000)
+    sound = Sound(signal, signal, 44100)
+
+    processed = DistortionProcessor(gain=2.0, kind="tanh").process([sound])
+
+    assert processed.is_mono
+    assert np.allclose(processed.left, np.tanh(signal * 2.0), atol=1e-4)
+
+
+def test_process_control_rate_gain():
+    sample_rate = 7800
+    t = np.linspace(0, 1, sample_rate)
+    signal = np.full(sample_rate, 0.1)
+    sound = Sound(signal, signal, sample_rate)
+    gain = "5 + 4 * sin(2 * pi * 440 * t)"
+
+    # Modulated gains are evaluated at every sample unless a control period is given
+    processed = DistortionProcessor(gain=gain, kind="hard")._process(sound)
+    expected = 0.1 * (5 + 4 * np.sin(2 * np.pi * 440 * t))
+    assert np.allclose(processed.left, expected, atol=1e-4)
+
+    processed = DistortionProcessor(gain=gain, kind="hard", control=32)._process(sound)
+    assert np.abs(processed.left - expected).max() > 0.1
+    assert np.allclose(processed.left[::32], expected[::32], atol=1e-4)
+
+
+def test_process_mix():
+    sample_rate = 44100
+    t = np.arange(sample_rate) / sample_rate
+    left = 0.5 * np.sin(2 * np.pi * 100 * t)
+    sound = Sound(left, -left, sample_rate)
+
+    for oversample in ("1", "4"):
+        processor = DistortionProcessor(gain=3.0, kind="tanh", oversample=oversample, mix="t")
+        processed = processor._process(sound)
+
+        m = np.linspace(0, 1, sample_rate)
+        expected = (1 - m) * left + m * np.tanh(left * 3.0)
+        assert np.allclose(processed.left, expected, atol=1e-2 if oversample != "1" else 1e-4)
+        assert np.allclose(processed.right, -processed.left)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from bender.delayline import INTERPOLATIONS, DelayLine, get_table
+
+
+@pytest.mark.parametrize("interpolation", INTERPOLATIONS)
+def test_integer_delay(interpolation):
+    signal = np.random.default_rng(0).uniform(-1, 1, 1000)
+
+    result = DelayLine(100, interpolation).process(signal, 37)
+
+    assert np.array_equal(result[:37], np.zeros(37))
+    assert np.allclose(result[37:], signal[:-37])
+
+
+@pytest.mark.parametrize("interpolation", INTERPOLATIONS)
+def test_fractional_delay(interpolation):
+    sr = 48000
+    t = np.arange(sr) / sr
+    signal = np.sin(2 * np.pi * 1000 * t)
+
+    result = DelayLine(100, interpolation).process(signal, 10.25)
+    expected = np.sin(2 * np.pi * 1000 * (t - 10.25 / sr))
+
+    # Linear interpolation dips between samples, the other interpolations are much closer
+    tolerance = {"linear": 1e-2, "lagrange": 1e-3, "sinc": 1e-3}[interpolation]
+    assert np.max(np.abs(result[100:] - expected[100:])) < tolerance
+
+
+def test_blocks_keep_state():
+    signal = np.random.default_rng(1).uniform(-1, 1, 1000)
+    delay = 20 + 10 * np.sin(np.linspace(0, 10, len(signal)))
+
+    expected = DelayLine(40).process(signal, delay)
+
+    line = DelayLine(40)
+    blocks = [
+        line.process(signal[offset : offset + 64], delay[offset : offset + 64])
+        for offset in range(0, len(signal), 64)
+    ]
+
+    assert np.array_equal(np.concatenate(blocks), expected)
+
+
+def test_delay_is_clamped():
+    signal = np.random.default_rng(2).uniform(-1, 1, 100)
+
+    result = DelayLine(10, "linear").process(signal, 50)
+
+    assert np.allclose(result[10:], signal[:-10])
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        get_table("cubic")
+
+    with pytest.raises(ValueError):
+        DelayLine(-1)
+
+    with pytest.raises(ValueError):
+        DelayLine(10).process(np.zeros(10), np.zeros(3))
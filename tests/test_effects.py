@@ -1,6 +1,14 @@
 import numpy as np
-
-from bender.effects import brick_wall_limit, mix
+import pytest
+
+from bender.effects import (
+    Limiter,
+    attack_boxes,
+    brick_wall_limit,
+    linked_limit,
+    mix,
+    sliding_min,
+)
 from bender.modulation import Modulation
 
 
@@ -49,6 +57,48 @@ def test_mix_modulation_signal():
     assert np.allclose(result, expected)
 
 
+def test_mix_pads_shorter_dry_with_modulation():
+    dry = np.array([1.0, 2.0, 3.0, 4.0, 5.0], dtype=np.float32)
+    wet = np.array([10.0, 20.0], dtype=np.float32)
+
+    result = mix(dry, wet, sample_rate=5, mix=Modulation("t"))
+
+    mix_value = np.linspace(0, 1, num=5)
+    expected = (1 - mix_value) * dry + mix_value * np.pad(wet, (0, 3))
+
+    assert np.allclose(result, expected)
+
+
+def test_mix_out_buffer():
+    rng = np.random.default_rng(0)
+    dry = rng.uniform(-1.0, 1.0, size=100).astype(np.float32)
+    wet = rng.uniform(-1.0, 1.0, size=100).astype(np.float32)
+    expected = 0.75 * dry + 0.25 * wet
+
+    out = np.empty(100, dtype=np.float32)
+    assert mix(dry, wet, 44100, Modulation(0.25), out=out) is out
+    assert np.allclose(out, expected)
+
+    # Mixing into one of the inputs
+    assert mix(dry, wet, 44100, Modulation(0.25), out=wet) is wet
+    assert np.allclose(wet, expected)
+
+    out = np.empty(100, dtype=np.float32)
+    mix(dry, dry, 44100, Modulation(0.0), out=out)
+    assert np.array_equal(out, dry)
+
+    with pytest.raises(ValueError):
+        mix(dry, wet, 44100, Modulation(0.5), out=np.empty(10, dtype=np.float32))
+
+
+def test_mix_empty():
+    dry = np.zeros(0, dtype=np.float32)
+    wet = np.ones(3, dtype=np.float32)
+
+    assert np.allclose(mix(dry, wet, 44100, Modulation(0.5)), 0.5)
+    assert np.allclose(mix(dry, wet, 44100, Modulation("0.5 + t * 0")), 0.5)
+
+
 def test_brick_wall_limit_no_change_below_threshold():
     sample_rate = 48000
     signal = np.full(1000, 0.1, dtype=np.float32)
@@ -69,3 +119,80 @@ def test_brick_wall_limit_caps_peaks():
     assert np.max(np.abs(result)) <= 1.0 + 1e-2
     assert np.abs(result[1000]) < np.abs(signal[1000])
     assert np.abs(result[2000]) < np.abs(signal[2000])
+
+
+def test_effects_keep_dtype():
+    signal = np.random.uniform(-2.0, 2.0, size=5000).astype(np.float32)
+
+    assert brick_wall_limit(signal, 48000).dtype == np.float32
+    assert mix(signal, signal[::-1], 48000, Modulation(0.3)).dtype == np.float32
+    assert mix(signal, signal[::-1], 48000, Modulation("t")).dtype == np.float32
+
+
+def test_sliding_min():
+    values = np.random.uniform(0.0, 1.0, size=1000).astype(np.float32)
+
+    for window in (1, 2, 7, 64, 999, 1000, 2000):
+        expected = [np.min(values[i : i + window]) for i in range(len(values))]
+        assert np.array_equal(sliding_min(values, window), expected), window
+
+    assert len(sliding_min(values[:0], 10)) == 0
+
+
+def test_attack_boxes():
+    for attack_samples in (2, 16, 96, 4800):
+        lengths, weights = attack_boxes(attack_samples)
+
+        # The staircase keeps unit gain at DC and covers the whole lookahead
+        assert lengths[-1] == attack_samples
+        assert np.all(weights >= 0.0)
+        assert np.isclose(np.sum(lengths * weights), 1.0)
+
+    # Short kernels have a step for every sample and are exact
+    lengths, weights = attack_boxes(16)
+    kernel = 1 / (1 + np.exp(np.linspace(-2, 2, 16)))
+    staircase = np.array([np.sum(weights[lengths > m]) for m in range(16)])
+    assert np.allclose(staircase, kernel / np.sum(kernel))
+
+
+def test_linked_limit_matches_brick_wall_limit():
+    signal = np.random.default_rng(0).uniform(-2.0, 2.0, size=10000).astype(np.float32)
+
+    result = linked_limit(signal[:, None], 48000)
+
+    assert result.dtype == np.float32
+    assert np.allclose(result[:, 0], brick_wall_limit(signal, 48000), atol=1e-6)
+
+
+def test_linked_limit_shares_gain():
+    signal = np.random.default_rng(0).uniform(-2.0, 2.0, size=10000).astype(np.float32)
+    data = np.stack([signal, signal * 0.1], axis=1)
+
+    result = linked_limit(data, 48000)
+
+    # The quiet channel is reduced by the same gain as the loud one
+    assert np.allclose(result[:, 1], result[:, 0] * 0.1, atol=1e-6)
+    assert np.max(np.abs(result)) <= 1.0 + 1e-2
+
+    # Limiting in place gives the same result
+    linked_limit(data, 48000, out=data)
+    assert np.array_equal(data, result)
+
+    with pytest.raises(ValueError):
+        linked_limit(signal, 48000)
+
+
+def test_limiter_streaming_matches_batch():
+    data = np.random.default_rng(0).uniform(-2.0, 2.0, size=(10000, 2)).astype(np.float32)
+    expected = linked_limit(data, 48000, attack_time=0.002, release_time=0.02)
+
+    for block_size in (1, 37, 96, 4096, 20000):
+        limiter = Limiter(2, 48000, attack_time=0.002, release_time=0.02)
+        blocks = [data[i : i + block_size] for i in range(0, len(data), block_size)]
+
+        result = np.concatenate(list(limiter.stream(blocks)))
+
+        assert np.array_equal(result, expected), block_size
+
+    with pytest.raises(ValueError):
+        Limiter(2, 48000).process(data[:, :1])
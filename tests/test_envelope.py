@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from bender.envelope import Envelope
+
+
+def test_parse():
+    envelope = Envelope.parse("env(0:0, 1:1:-4, 2.5:0.3)")
+
+    assert envelope == Envelope((0.0, 1.0, 2.5), (0.0, 1.0, 0.3), (0.0, -4.0, 0.0))
+    assert Envelope.parse("sin(t)") is None
+
+    for text in ("env()", "env(0:1:2:3)", "env(0:a)", "env(1:0, 0:1)"):
+        with pytest.raises(ValueError):
+            Envelope.parse(text)
+
+
+def test_linear():
+    envelope = Envelope.parse("env(1:0, 2:1, 4:0)")
+    t = np.linspace(0, 5, 501)
+
+    assert np.allclose(envelope(t), np.interp(t, [1, 2, 4], [0, 1, 0]))
+
+
+def test_curves():
+    t = np.linspace(0, 1, 101)
+    fast = Envelope.parse("env(0:0, 1:1:-4)")(t)
+    slow = Envelope.parse("env(0:0, 1:1:4)")(t)
+
+    assert fast[0] == 0.0 and np.isclose(fast[-1], 1.0)
+    assert np.all(np.diff(fast) > 0) and np.all(np.diff(slow) > 0)
+    assert np.all(fast[1:-1] > t[1:-1])
+    assert np.all(slow[1:-1] < t[1:-1])
+
+
+def test_hold_outside_points():
+    envelope = Envelope.parse("env(1:0.2, 2:0.8:3)")
+
+    assert np.allclose(envelope(np.array([0.0, 0.5, 2.0, 10.0])), [0.2, 0.2, 0.8, 0.8])
+    assert np.allclose(Envelope.parse("env(1:0.5)")(np.array([0.0, 2.0])), 0.5)
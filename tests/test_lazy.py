@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from bender.lazy import LazySound
+from bender.modulation import Modulation
+from bender.sound import Sound
+from bender.waveshaper import get_table, waveshape
+
+
+def _make_sound():
+    left = np.linspace(-2.0, 2.0, 1000)
+    right = np.linspace(2.0, -2.0, 1000)
+    return Sound(left, right, 1000)
+
+
+def test_no_operations_returns_source():
+    sound = _make_sound()
+
+    assert LazySound(sound).compute() is sound
+    assert LazySound(sound).gain(1.0).mix(1.0).compute() is sound
+
+
+def test_fused_chain():
+    sound = _make_sound()
+
+    result = LazySound(sound).gain(2.0).tanh().clip(-0.5, 0.5).mix(0.25).compute()
+
+    wet = np.clip(np.tanh(sound.data * 2.0), -0.5, 0.5)
+    expected = 0.75 * sound.data + 0.25 * wet
+
+    assert result.data.dtype == np.float32
+    assert result.sample_rate == sound.sample_rate
+    assert np.allclose(result.data, expected, atol=1e-6)
+
+
+def test_shape_matches_waveshape():
+    sound = _make_sound()
+    table = get_table("cubic")
+
+    result = LazySound(sound).gain(1.5).shape(table).compute()
+
+    assert np.allclose(result.data, waveshape(sound.data, 1.5, table), atol=1e-6)
+
+    with pytest.raises(ValueError):
+        LazySound(sound).shape(table).shape(table[:-1])
+
+
+def test_modulated_operands():
+    sound = _make_sound()
+
+    lazy = LazySound(sound).gain(Modulation("t")).mix(Modulation("1 - t"))
+
+    t = np.linspace(0, sound.duration, num=len(sound))[:, None]
+    expected = t * sound.data + (1 - t) * (sound.data * t)
+
+    assert np.allclose(lazy.compute().data, expected, atol=1e-5)
+    assert np.array_equal(lazy.compute(block_size=64).data, lazy.compute().data)
+
+
+def test_identical_channels_computed_once():
+    signal = np.linspace(-1.0, 1.0, 1000)
+    sound = Sound(signal, signal, 1000)
+
+    result = LazySound(sound).gain(Modulation("1 + t")).tanh().compute()
+
+    assert result.is_mono
+    assert result.channels == 2
+
+
+def test_operations_do_not_mutate():
+    sound = _make_sound()
+    lazy = LazySound(sound).gain(2.0)
+    lazy.tanh()
+    lazy.mix(Modulation("t"))
+
+    assert np.array_equal(lazy.compute().data, (sound.data * 2.0).astype(np.float32))
+
+    with pytest.raises(ValueError):
+        lazy.clip(1.0, -1.0)
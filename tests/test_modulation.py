@@ -2,7 +2,8 @@ import numpy as np
 import pytest
 from numpy import pi
 
-from bender.modulation import Modulation
+from bender import modulation
+from bender.modulation import Modulation, _compile, clear_memo
 from bender.sound import Sound
 
 
@@ -107,3 +108,142 @@ def test_modulation_equality():
 
     mod9 = Modulation("sin(2*pi*t)", min_value=-1, max_value=0.5)
     assert mod7 != mod9
+
+
+def test_like_returns_float32():
+    x = np.zeros(1000, dtype=np.float32)
+
+    assert Modulation(0.5).like(x).dtype == np.float32
+    assert Modulation("sin(2*pi*t)").like(x).dtype == np.float32
+    assert Modulation("t", min_value=0.1, max_value=0.2).like(x).dtype == np.float32
+
+
+def test_like_memoized():
+    x = np.zeros(1000)
+
+    result = Modulation("sin(t)").like(x, 48000)
+
+    # Equal modulations share the evaluated signal
+    assert Modulation("sin(t)").like(x, 48000) is result
+    assert not result.flags.writeable
+    assert Modulation("sin(t)").like(x, 44100) is not result
+    assert Modulation("sin(t)", max_value=0.0).like(x, 48000) is not result
+
+
+def test_expression_compiled_once():
+    mod = Modulation("cos(3 * pi * t)")
+    t = np.linspace(0, 1, 100)
+
+    mod(t)
+    misses = _compile.cache_info().misses
+    Modulation("cos(3 * pi * t)", min_value=0.0)(t)
+
+    assert _compile.cache_info().misses == misses
+
+    with pytest.raises(ValueError):
+        Modulation("x * t")(t)
+
+
+def test_blocks():
+    mod = Modulation("sin(2*pi*t*3) + t")
+    sound = Sound(np.zeros(1000), np.zeros(1000), 48000)
+    expected = mod.like(sound)
+
+    blocks = list(mod.blocks(sound, block_size=300))
+    assert [len(block) for block in blocks] == [300, 300, 300, 100]
+    assert all(block.dtype == np.float32 for block in blocks)
+    assert np.array_equal(np.concatenate(blocks), expected)
+
+    assert np.array_equal(np.concatenate(list(mod.blocks(sound, start=450))), expected[450:])
+    assert np.array_equal(mod.block(450, 100, 48000, length=1000), expected[450:550])
+    assert np.array_equal(
+        np.concatenate(list(Modulation(0.3).blocks(sound, block_size=300))),
+        np.full(1000, 0.3, dtype=np.float32),
+    )
+
+
+def test_block_without_length():
+    mod = Modulation("t")
+
+    result = mod.block(48000, 10, 48000)
+
+    assert np.allclose(result, np.arange(48000, 48010) / 48000)
+
+
+def test_control_period():
+    x = np.zeros(10000)
+    mod = Modulation("0.5 + 0.3 * sin(2 * pi * t) * exp(-t)", control_period=64)
+    exact = Modulation("0.5 + 0.3 * sin(2 * pi * t) * exp(-t)").like(x, 48000)
+
+    result = mod.like(x, 48000)
+
+    assert result.dtype == np.float32
+    assert np.array_equal(result[::64], exact[::64])
+    assert np.allclose(result, exact, atol=1e-5)
+
+    # Control points do not depend on block boundaries
+    assert np.array_equal(np.concatenate(list(mod.blocks(x, 48000, block_size=100))), result)
+
+    assert Modulation(mod).control_period == 64
+    assert Modulation(mod) == mod
+    assert Modulation(mod, control_period=1) != mod
+
+    with pytest.raises(ValueError):
+        Modulation("t", control_period=0)
+
+
+def test_periodic_wavetable():
+    x = np.zeros(100000)
+    mod = Modulation("0.5 + 0.3 * sin(2 * pi * 5 * t) + 0.1 * cos(2 * pi * 15 * t)")
+
+    result = mod.like(x, 48000)
+
+    t = np.linspace(0, len(x) / 48000, num=len(x))
+    expected = 0.5 + 0.3 * np.sin(2 * pi * 5 * t) + 0.1 * np.cos(2 * pi * 15 * t)
+
+    assert result.dtype == np.float32
+    assert np.allclose(result, expected, atol=1e-6)
+    assert np.array_equal(np.concatenate(list(mod.blocks(x, 48000, block_size=999))), result)
+
+    # Constraints apply to the table
+    assert np.max(Modulation("sin(2 * pi * t)", max_value=0.5).like(x, 48000)) <= 0.5
+
+    # Steps are not smoothed by a wavetable
+    square = Modulation("where(sin(2 * pi * 5 * t) > 0, 1, 0)").like(x, 48000)
+    assert np.array_equal(square, np.where(np.sin(2 * pi * 5 * t) > 0, 1, 0))
+
+
+def test_envelope_modulation():
+    mod = Modulation("env(0:0, 0.01:1:-4, 0.02:0.5)", max_value=0.9)
+    x = np.zeros(1000)
+
+    result = mod.like(x, 48000)
+
+    assert result.dtype == np.float32
+    assert result[0] == 0.0
+    assert np.max(result) == np.float32(0.9)
+    assert np.allclose(result[-10:], 0.5)
+    assert np.array_equal(np.concatenate(list(mod.blocks(x, 48000, block_size=64))), result)
+
+    with pytest.raises(ValueError):
+        Modulation("env(0:x)")
+
+
+def test_like_memo_bounded(monkeypatch):
+    monkeypatch.setattr(modulation, "MEMO_BYTES", 10000)
+    clear_memo()
+
+    # Longer signals than the limit are not kept
+    long = Modulation("sin(t)").like(np.zeros(5000), 48000)
+    assert Modulation("sin(t)").like(np.zeros(5000), 48000) is not long
+
+    # The least recently used signals are released first
+    first = Modulation("sin(t)").like(np.zeros(1000), 48000)
+    second = Modulation("cos(t)").like(np.zeros(1000), 48000)
+    assert Modulation("sin(t)").like(np.zeros(1000), 48000) is first
+    Modulation("t").like(np.zeros(1000), 48000)
+    assert Modulation("sin(t)").like(np.zeros(1000), 48000) is first
+    assert Modulation("cos(t)").like(np.zeros(1000), 48000) is not second
+
+    clear_memo()
+    assert Modulation("sin(t)").like(np.zeros(1000), 48000) is not first
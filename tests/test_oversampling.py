@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from bender.oversampling import OVERSAMPLING_FACTORS, Oversampler
+
+
+def _sines(sr: int, frequencies: list[float]) -> np.ndarray:
+    t = np.arange(sr) / sr
+    return np.stack([np.sin(2 * np.pi * f * t) for f in frequencies], axis=1)
+
+
+@pytest.mark.parametrize("factor", OVERSAMPLING_FACTORS)
+def test_passthrough_is_aligned(factor):
+    data = _sines(48000, [1000, 15000])
+
+    oversampler = Oversampler(factor, 2)
+    blocks = [data[offset : offset + 1000] for offset in range(0, len(data), 1000)]
+    result = np.concatenate(list(oversampler.stream(blocks, lambda block, _: block)))
+
+    assert result.shape == data.shape
+    # The filters ring at the edges of the signal
+    assert np.allclose(result[200:-200], data[200:-200], atol=1e-3)
+
+
+def test_block_size_does_not_matter():
+    data = np.random.default_rng(0).uniform(-1, 1, (5000, 2))
+
+    def shape(block, _):
+        return np.tanh(4 * block)
+
+    whole = np.concatenate(list(Oversampler(4, 2).stream([data], shape)))
+    blocks = [data[offset : offset + 333] for offset in range(0, len(data), 333)]
+    blockwise = np.concatenate(list(Oversampler(4, 2).stream(blocks, shape)))
+
+    assert np.allclose(whole, blockwise, atol=1e-6)
+
+
+def test_positions_are_oversampled():
+    positions = []
+
+    def shape(block, start):
+        positions.append((start, len(block)))
+        return block
+
+    list(Oversampler(8, 1).stream([np.zeros((100, 1)), np.zeros((50, 1))], shape))
+
+    assert positions[:2] == [(0, 800), (800, 400)]
+
+
+def test_oversampling_reduces_aliasing():
+    sr = 48000
+    data = _sines(sr, [4900])
+
+    def aliasing(factor: int) -> float:
+        shaped = np.concatenate(
+            list(Oversampler(factor, 1).stream([data], lambda block, _: np.tanh(8 * block)))
+        )
+        spectrum = np.abs(np.fft.rfft(shaped[:, 0] * np.hanning(sr)))
+        # Aliases of the harmonics above the Nyquist frequency fall between the harmonics, the
+        # half-band filters do not attenuate the band right below the Nyquist frequency
+        bins = np.arange(len(spectrum))
+        harmonics = bins % 4900
+        aliases = spectrum[(harmonics > 50) & (harmonics < 4850) & (bins < 20000)]
+        return aliases.max() / spectrum.max()
+
+    assert aliasing(2) < aliasing(1) / 5
+    assert aliasing(8) < aliasing(1) / 1000
+
+
+def test_invalid_factor():
+    with pytest.raises(ValueError):
+        Oversampler(3, 2)
+
+    with pytest.raises(ValueError):
+        Oversampler(2, 2).process(np.zeros((10, 1)), lambda block, _: block)
@@ -1,9 +1,11 @@
 import pytest
 
+from bender.modulation import Modulation
 from bender.parameter import (
     BoolParameter,
     FloatParameter,
     IntParameter,
+    ModulationParameter,
     StringParameter,
     build_parameters,
 )
@@ -85,3 +87,13 @@ def test_build_parameters():
     unknown_values = {"param1": "value1", "param2": "true", "unknown": "something"}
     with pytest.raises(ValueError):
         build_parameters(prototypes, unknown_values)
+
+
+def test_modulation_parameter():
+    param = ModulationParameter(min_value=0.0, max_value=1.0, control_period=16)
+
+    modulation = param.parse("t")
+
+    assert modulation.control_period == 16
+    assert "control period: 16" in param.traits
+    assert modulation == Modulation("t", min_value=0.0, max_value=1.0, control_period=16)
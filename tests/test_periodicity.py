@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from bender.periodicity import find_period
+
+
+@pytest.mark.parametrize(
+    "expression, period",
+    [
+        ("sin(2*pi*0.5*t)", 2.0),
+        ("0.5 + 0.3*sin(2*pi*t) + 0.1*cos(2*pi*3*t)", 1.0),
+        ("sin(2*pi*1.5*t) + sin(2*pi*2*t)", 2.0),
+        ("sin(t)", 2 * math.pi),
+        ("abs(sin(sin(2*pi*4*t)))", 0.25),
+    ],
+)
+def test_periodic_expressions(expression, period):
+    result = find_period(expression)
+
+    assert result is not None
+    assert math.isclose(result[0], period)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["t", "2*pi", "t*sin(2*pi*t)", "exp(-t)*sin(t)", "sin(t*t)", "sin(2*pi*sqrt(2)*t) + sin(t)"],
+)
+def test_non_periodic_expressions(expression):
+    assert find_period(expression) is None
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "tan(pi*t)",
+        "(3*t) % 2",
+        "where(sin(2*pi*2*t) > 0, 1, -1)",
+        "sin(2*pi*t) > 0",
+        "sign(sin(2*pi*t))",
+        "1 / sin(2*pi*t)",
+    ],
+)
+def test_discontinuous_expressions(expression):
+    assert find_period(expression) is None
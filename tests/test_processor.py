@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from bender.processor import OneToOneProcessor
+from bender.sound import Sound
+
+
+class _GainProcessor(OneToOneProcessor):
+    channel_independent = True
+
+    def _process_channel(self, signal: np.ndarray, sample_rate: int) -> np.ndarray:
+        return signal * 0.5
+
+
+def test_channel_independent_processor():
+    left = np.array([0.0, 1.0, 0.5])
+    right = np.array([0.0, -1.0, -0.5])
+    sound = Sound(left, right, 44100)
+
+    processed = _GainProcessor().process([sound])
+
+    assert np.allclose(processed.left, left * 0.5)
+    assert np.allclose(processed.right, right * 0.5)
+    assert processed.sample_rate == sound.sample_rate
+
+
+def test_processor_without_implementation():
+    sound = Sound(np.zeros(3), np.zeros(3), 44100)
+
+    with pytest.raises(NotImplementedError):
+        OneToOneProcessor().process([sound])
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from bender.resampler import RESAMPLE_QUALITIES, resample, resample_blocks
+from bender.sound import Sound
+
+
+@pytest.mark.parametrize("quality", RESAMPLE_QUALITIES)
+def test_resample_qualities(quality):
+    t = np.arange(24000) / 24000
+    data = np.stack([np.sin(2 * np.pi * 440 * t), np.cos(2 * np.pi * 440 * t)], axis=1)
+    data = data.astype(np.float32)
+
+    result = resample(data, 24000, 48000, quality)
+
+    t_up = np.arange(48000) / 48000
+    expected = np.stack([np.sin(2 * np.pi * 440 * t_up), np.cos(2 * np.pi * 440 * t_up)], axis=1)
+
+    assert result.shape == (48000, 2)
+    assert result.dtype == np.float32
+    # ignore filter transients at the edges
+    assert np.allclose(result[1000:-1000], expected[1000:-1000], atol=1e-2)
+
+
+@pytest.mark.parametrize("quality", RESAMPLE_QUALITIES)
+def test_resample_blocks(quality):
+    data = np.random.uniform(-1.0, 1.0, size=(10000, 2)).astype(np.float32)
+
+    blocks = list(resample_blocks(data, 48000, 16000, block_size=3000, quality=quality))
+    result = np.concatenate(blocks)
+
+    assert abs(len(result) - 10000 // 3) <= 1
+
+
+def test_unknown_quality():
+    data = np.zeros((100, 2), dtype=np.float32)
+
+    with pytest.raises(ValueError):
+        resample(data, 48000, 16000, "best")
+
+
+def test_sound_resample_quality():
+    sound = Sound(np.zeros(4800), np.zeros(4800), 48000)
+
+    resampled_sound = sound.resample(16000, quality="polyphase")
+
+    assert resampled_sound.sample_rate == 16000
+    assert len(resampled_sound) == 1600
@@ -1,7 +1,8 @@
 import numpy as np
 import pytest
+import soundfile
 
-from bender.sound import Sound
+from bender.sound import SAMPLE_DTYPE, Sound, SoundReader, SoundWriter
 
 
 def test_sound_initialization():
@@ -71,3 +72,209 @@ def test_save_load(tmp_path):
     assert np.allclose(loaded_sound.left, sound.left, atol=1e-3)
     assert np.allclose(loaded_sound.right, sound.right, atol=1e-3)
     assert loaded_sound.sample_rate == sample_rate
+
+
+def test_load_mmap(tmp_path):
+    sound = Sound(np.linspace(-1.0, 1.0, 1000), np.linspace(1.0, -1.0, 1000), 44100)
+
+    path = tmp_path / "test.wav"
+    sound.save(path, bit_depth=16)
+
+    loaded_sound = Sound.load(path)
+    mapped_sound = Sound.load(path, mmap=True)
+
+    assert isinstance(mapped_sound.data, np.memmap)
+    assert np.array_equal(mapped_sound.left, loaded_sound.left)
+    assert np.array_equal(mapped_sound.right, loaded_sound.right)
+    assert mapped_sound.sample_rate == loaded_sound.sample_rate
+
+
+def test_sound_reader(tmp_path):
+    data = np.random.uniform(-1.0, 1.0, size=(1000, 2)).astype(np.float32)
+
+    path = tmp_path / "test.wav"
+    soundfile.write(path, data, 44100, subtype="FLOAT")
+
+    reader = SoundReader(path)
+    assert len(reader) == 1000
+    assert reader.channels == 2
+
+    blocks = list(reader.blocks(block_size=300))
+    assert [len(block) for block in blocks] == [300, 300, 300, 100]
+    assert np.array_equal(np.concatenate(blocks), data)
+    assert np.array_equal(reader.view(), data)
+
+
+def test_interleaved_storage():
+    data = np.array([[0.0, 1.0], [0.5, -0.5], [1.0, 0.0]], dtype=np.float32)
+    sound = Sound.from_array(data, 44100)
+
+    assert sound.data is data
+    assert np.shares_memory(sound.left, data)
+    assert np.array_equal(sound.right, data[:, 1])
+
+    # Channels that are views of an interleaved array are not copied
+    assert np.shares_memory(Sound(sound.left, sound.right, 44100).data, data)
+    assert np.shares_memory(sound.with_filename("test").data, data)
+
+    with pytest.raises(ValueError):
+        Sound.from_array(data[:, 0], 44100)
+
+
+def test_sound_writer(tmp_path):
+    data = np.random.uniform(-1.0, 1.0, size=(1000, 2)).astype(np.float32)
+
+    path = tmp_path / "test.wav"
+    with SoundWriter(path, 44100, bit_depth=32, block_size=300) as writer:
+        writer.write(data[:500])
+        writer.write(data[500:])
+
+    assert writer.frames == 1000
+
+    loaded_sound = Sound.load(path)
+    assert np.allclose(loaded_sound.data, data, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        SoundWriter(tmp_path / "invalid.wav", 44100, bit_depth=12)
+
+
+def test_sound_writer_identical_channels(tmp_path):
+    signal = np.random.default_rng(0).uniform(-1.0, 1.0, 1000).astype(np.float32)
+    sound = Sound(signal, signal, 44100)
+
+    # Blocks keep the single stored channel until the writer expands them
+    blocks = list(sound.blocks(block_size=300, expand=False))
+    assert [block.shape for block in blocks] == [(300, 1)] * 3 + [(100, 1)]
+
+    path = tmp_path / "test.wav"
+    with SoundWriter(path, 44100, bit_depth=32, block_size=256) as writer:
+        for block in blocks:
+            writer.write(block)
+
+    loaded_sound = Sound.load(path)
+    assert loaded_sound.channels == 2
+    assert np.allclose(loaded_sound.data, np.column_stack([signal, signal]), atol=1e-6)
+
+    with pytest.raises(ValueError):
+        with SoundWriter(tmp_path / "invalid.wav", 44100, channels=3) as writer:
+            writer.write(np.zeros((10, 2), dtype=np.float32))
+
+
+def test_resampled_blocks():
+    t = np.linspace(0, 1, 44100, endpoint=False)
+    signal = np.sin(2 * np.pi * 440 * t)
+    sound = Sound(signal, signal, 44100)
+
+    blocks = list(sound.resampled_blocks(48000, block_size=10000))
+    resampled = np.concatenate(blocks)
+
+    assert len(blocks) > 1
+    assert abs(len(resampled) - 48000) <= 1
+    assert np.allclose(resampled, sound.resample(48000).data[: len(resampled)], atol=1e-3)
+
+
+def test_sample_dtype(tmp_path):
+    left = np.array([0.0, 1.0, 0.5], dtype=np.float64)
+    right = np.array([0.0, -1.0, -0.5], dtype=np.float64)
+
+    sound = Sound(left, right, 44100)
+    assert sound.data.dtype == SAMPLE_DTYPE
+    assert Sound.from_array(np.zeros((3, 2)), 44100).data.dtype == SAMPLE_DTYPE
+
+    processed_sound = sound.process(lambda x, _: x.astype(np.float64) * 0.5)
+    assert processed_sound.data.dtype == SAMPLE_DTYPE
+
+    assert sound.resample(22050).data.dtype == SAMPLE_DTYPE
+
+    path = tmp_path / "test.wav"
+    sound.save(path)
+    assert Sound.load(path).data.dtype == SAMPLE_DTYPE
+    assert Sound.load(path, mmap=True).data.dtype == SAMPLE_DTYPE
+
+
+def test_process_parallel():
+    left = np.random.uniform(-1.0, 1.0, size=10000)
+    right = np.random.uniform(-1.0, 1.0, size=10000)
+    sound = Sound(left, right, 44100)
+
+    processed_sound = sound.process(lambda x, _: np.tanh(x * 2.0), parallel=True)
+    expected_sound = sound.process(lambda x, _: np.tanh(x * 2.0))
+
+    assert np.array_equal(processed_sound.data, expected_sound.data)
+
+
+def test_mono(tmp_path):
+    mono = np.linspace(-1.0, 1.0, 1000, dtype=np.float32)
+    sound = Sound(mono, mono, 44100)
+
+    assert sound.is_mono
+    assert sound.data.shape == (1000, 1)
+    assert np.shares_memory(sound.data, mono)
+    assert sound.left is not None and np.array_equal(sound.left, sound.right)
+
+    calls = []
+
+    def fn(x, _):
+        calls.append(x)
+        return x * 0.5
+
+    processed_sound = sound.process(fn)
+    assert len(calls) == 1
+    assert processed_sound.is_mono
+    assert np.allclose(processed_sound.right, mono * 0.5)
+
+    assert sound.resample(22050).is_mono
+    assert all(block.shape[1] == 2 for block in sound.blocks(300))
+    assert all(block.shape[1] == 2 for block in sound.resampled_blocks(22050, 300))
+
+    path = tmp_path / "test.wav"
+    sound.save(path, bit_depth=16)
+    assert soundfile.info(path).channels == 2
+
+    loaded_sound = Sound.load(path)
+    assert not loaded_sound.is_mono
+    assert np.allclose(loaded_sound.left, mono, atol=1e-3)
+    assert np.allclose(loaded_sound.right, mono, atol=1e-3)
+
+    assert not Sound(mono, mono.copy(), 44100).is_mono
+
+
+def test_multichannel(tmp_path):
+    channels = [np.full(100, i / 4, dtype=np.float32) for i in range(4)]
+    sound = Sound.from_channels(channels, 44100)
+
+    assert sound.channels == 4
+    assert sound.data.shape == (100, 4)
+    assert np.array_equal(sound.channel(3), channels[3])
+    assert np.array_equal(sound.right, channels[1])
+
+    with pytest.raises(IndexError):
+        sound.channel(4)
+
+    processed = sound.process(lambda x, sr: x * 2.0, parallel=True)
+    assert processed.channels == 4
+    assert np.allclose(processed.channel(2), 1.0)
+
+    path = tmp_path / "multichannel.wav"
+    sound.save(path, bit_depth=32)
+
+    assert SoundReader(path).channels == 4
+    for loaded_sound in (Sound.load(path), Sound.load(path, mmap=True)):
+        assert loaded_sound.channels == 4
+        assert np.allclose(loaded_sound.data, sound.data, atol=1e-6)
+
+    assert Sound.load(path, sample_rate=22050).channels == 4
+
+
+def test_multichannel_mono():
+    mono = np.linspace(-1.0, 1.0, 100, dtype=np.float32)
+    sound = Sound.from_channels([mono] * 6, 44100)
+
+    assert sound.is_mono
+    assert sound.channels == 6
+    assert sound.data.shape == (100, 1)
+    assert next(sound.blocks()).shape == (100, 6)
+    assert sound.process(lambda x, sr: x, parallel=True).channels == 6
+
+    with pytest.raises(ValueError):
+        Sound.from_array(np.zeros((100, 3), dtype=np.float32), 44100, channels=2)
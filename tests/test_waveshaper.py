@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from bender.waveshaper import CURVES, TABLE_RANGE, get_table, make_table, waveshape
+
+
+@pytest.mark.parametrize("kind", list(CURVES))
+def test_tables_match_curves(kind):
+    data = np.random.default_rng(0).uniform(-4, 4, (1000, 2))
+
+    result = waveshape(data, 1.0, get_table(kind))
+
+    assert np.allclose(result, CURVES[kind](data), atol=1e-4)
+
+
+def test_hard_clip_corners():
+    data = np.linspace(-3, 3, 1001)[:, None]
+
+    result = waveshape(data, 2.0, get_table("hard"), out=np.empty(data.shape))
+
+    # The corners of the clip are table points, so the interpolation is exact up to rounding
+    assert np.allclose(result, np.clip(2.0 * data, -1.0, 1.0), rtol=0, atol=1e-12)
+
+
+def test_modulated_gain_in_place():
+    data = np.full((4, 2), 0.25)
+    gain = np.array([0.0, 1.0, 2.0, 100.0])
+
+    # Inputs beyond the table range hold the last value
+    table = make_table(lambda x: x)
+    result = waveshape(data, gain, table, out=data)
+
+    assert result is data
+    assert np.allclose(data[:, 0], [0.0, 0.25, 0.5, TABLE_RANGE])
+    assert np.allclose(data[:, 1], data[:, 0])
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        get_table("sine")
+
+    with pytest.raises(ValueError):
+        make_table(lambda x: np.where(x > 0, np.inf, 0.0))
+
+    with pytest.raises(ValueError):
+        waveshape(np.zeros(10), 1.0, get_table("tanh"))
+
+    with pytest.raises(ValueError):
+        waveshape(np.zeros((10, 2)), np.ones(3), get_table("tanh"))